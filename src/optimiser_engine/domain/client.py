@@ -34,6 +34,8 @@ class Client :
     client_id : int
         (identifiant client) Identifier associated with the client record.
     """
+    __slots__ = ('client_id', 'planning', 'constraints', 'features', 'prices', 'water_heater')
+
     def __init__(self, 
                  planning : Planning, 
                  constraints : Constraints, 
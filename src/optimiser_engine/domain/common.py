@@ -4,6 +4,31 @@ Author: @anaselb
 """
 
 from datetime import time 
+import numpy as np
+
+_MICROSECONDES_JOUR = 24 * 3600 * 1_000_000
+
+
+def _microsecondes_jour(moment) -> int:
+    """Microseconds elapsed since midnight at ``moment`` (a ``time`` or a ``datetime``, wall clock)."""
+    return ((moment.hour * 60 + moment.minute) * 60 + moment.second) * 1_000_000 + moment.microsecond
+
+
+def _instants_jour(start_date, N : int, step_min : float) -> np.ndarray:
+    """Time of day, in microseconds since midnight, of the ``N`` points ``start_date + i*step_min``."""
+    # Même arrondi que timedelta(minutes=i*step_min), puis modulo une journée (comme dt_i.time())
+    decalages_us = np.round(np.arange(N) * (step_min * 60e6)).astype(np.int64)
+    return (_microsecondes_jour(start_date) + decalages_us) % _MICROSECONDES_JOUR
+
+
+def _masque_creneaux(creneaux, instants_us : np.ndarray) -> np.ndarray:
+    """Boolean mask of the instants (microseconds since midnight) falling inside any of the slots."""
+    # Une ligne [début, fin[ par créneau : comparaison diffusée instants x créneaux, sans boucle par instant
+    bornes = np.array([(_microsecondes_jour(c.start), _microsecondes_jour(c.end)) for c in creneaux],
+                      dtype=np.int64).reshape(-1, 2)
+    instants_us = np.asarray(instants_us)[..., None]
+    return ((instants_us >= bornes[:, 0]) & (instants_us < bornes[:, 1])).any(axis=-1)
+
 
 class TimeSlot:  #Créneau
     """
@@ -16,6 +41,9 @@ class TimeSlot:  #Créneau
     end : datetime.time
         (heure de fin) End of the interval, exclusive.
     """
+    # Attributs fixes : pas de __dict__ par instance (objets plus légers et accès plus rapides)
+    __slots__ = ('start', 'end')
+
     def __init__(self, start: time, end: time):
         """
         Create a time slot defined by a start and end time.
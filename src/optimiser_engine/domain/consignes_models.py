@@ -21,6 +21,8 @@ class Setpoint :  #Point Consigne.
     drawn_volume : float
         (volume prévu) Expected drawn volume associated with the setpoint.
     """
+    __slots__ = ('_day', '_time', '_temperature', '_drawn_volume')
+
     def __init__(self, day : int, time_of_day : time, temperature : float, volume : float = 30) : 
         """
         Initialize a setpoint describing when and how the heater should operate.
@@ -235,6 +237,8 @@ class Planning:
     setpoints : list
         (liste de consignes) Sorted list of Setpoint instances representing the schedule.
     """
+    __slots__ = ('_setpoints',)
+
     def __init__(self, setpoints_list : List[Setpoint] = []):
         """
         Initialize a planning by a list of Setpoints.
@@ -4,10 +4,10 @@ Author: @anaselb
 """
 from typing import List
 from datetime import time
-from .common import TimeSlot
+from .common import TimeSlot, _instants_jour, _masque_creneaux
 from ..exceptions import OptimizerError
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime
 
 class DimensionNotRespected(OptimizerError) :
     """
@@ -15,6 +15,13 @@ class DimensionNotRespected(OptimizerError) :
     """
     pass
 
+_MINUTES_SEMAINE = 7 * 24 * 60
+
+def _microsecondes_semaine(date : datetime) -> int:
+    """Microseconds elapsed since the Monday 00:00 preceding ``date`` (wall clock)."""
+    secondes = ((date.weekday() * 24 + date.hour) * 60 + date.minute) * 60 + date.second
+    return secondes * 1_000_000 + date.microsecond
+
 class ConsumptionProfile:
     """
     Represents a weekly consumption profile with optional background noise.
@@ -27,6 +34,8 @@ class ConsumptionProfile:
         (bruit de fond) Default value used when no matrix is provided.
     """
     points_per_day = 24
+    __slots__ = ('_data', 'background_noise')
+
     def __init__(self, matrix_7x24=None, background_noise=300.0):
         """
         Initialize the consumption profile with optional predefined data.
@@ -118,7 +127,71 @@ class ConsumptionProfile:
         """
         if not isinstance(start_date, datetime):
             raise TypeError(f"L'argument 'start_date' doit être un objet datetime. Reçu: {type(start_date)}")
-        
+        decalages_us = self._decalages_us(N, step_min)
+        ###########CODE #######################################################################################
+        # Grille régulière (un point par heure) : l'indice de l'heure se calcule directement,
+        # sans boucle Python ni datetime par point.
+        minutes_semaine = ((_microsecondes_semaine(start_date) + decalages_us) // 60_000_000) % _MINUTES_SEMAINE
+        return self._interpoler(minutes_semaine)
+
+    def get_vector_batch(self, start_dates, N : int, step_min : float):
+        """
+        Generate the consumption vectors of several horizons at once (one row per start date).
+
+        Row ``k`` equals ``get_vector(start_dates[k], N, step_min)``; all rows are computed in a
+        single broadcast instead of one call per start date.
+
+        Parameters
+        ----------
+        start_dates : sequence of datetime.datetime
+            (dates de départ) Reference datetime of each horizon.
+        N : int
+            (nombre de points) Number of values per horizon.
+        step_min : float
+            (pas en minutes) Time step between points, expressed in minutes.
+
+        Returns
+        -------
+        numpy.ndarray
+            (matrice consommation) Array of shape (len(start_dates), N).
+
+        Raises
+        ------
+        TypeError
+            (type invalide) If a start date is not a datetime instance.
+        ValueError
+            (paramètre invalide) If N or step_min are non-positive or if data is missing.
+        """
+        for start_date in start_dates:
+            if not isinstance(start_date, datetime):
+                raise TypeError(f"Les dates de 'start_dates' doivent être des objets datetime. Reçu: {type(start_date)}")
+        decalages_us = self._decalages_us(N, step_min)
+        debuts_us = np.fromiter((_microsecondes_semaine(d) for d in start_dates), dtype=np.int64, count=len(start_dates))
+        # Une ligne par date de départ, une colonne par pas de temps
+        minutes_semaine = ((debuts_us[:, None] + decalages_us[None, :]) // 60_000_000) % _MINUTES_SEMAINE
+        return self._interpoler(minutes_semaine)
+
+    def _decalages_us(self, N, step_min):
+        """
+        Validate the horizon parameters and return the offset of each point from the start date.
+
+        Parameters
+        ----------
+        N : int
+            (nombre de points) Number of values to produce.
+        step_min : float
+            (pas en minutes) Time step between points, expressed in minutes.
+
+        Returns
+        -------
+        numpy.ndarray
+            (décalages) Integer microsecond offsets, rounded like ``timedelta(minutes=i*step_min)``.
+
+        Raises
+        ------
+        ValueError
+            (paramètre invalide) If N or step_min are non-positive or if data is missing.
+        """
         if not isinstance(N, int) or N <= 0:
             raise ValueError(f"Le nombre de points 'N' doit être un entier strictement positif. Reçu: {N}")
             
@@ -127,27 +200,30 @@ class ConsumptionProfile:
 
         if self.data is None:
             raise ValueError("La matrice de données du profil est manquante (None).")
-        ###########CODE #######################################################################################
-        t_axis = np.array([start_date + timedelta(minutes=i*step_min) for i in range(N)])
-        vector = np.zeros(N)
+        return np.round(np.arange(N) * (step_min * 60e6)).astype(np.int64)
 
-        for i, dt in enumerate(t_axis):
-            jour = dt.weekday()
-            heure_float = dt.hour + dt.minute / 60.0
-            
-            # Récupération des deux heures encadrantes pour l'interpolation
-            h1 = int(heure_float)
-            h2 = (h1 + 1) % 24
-            jour2 = jour if h2 > h1 else (jour + 1) % 7
-            
-            val1 = self.data[jour, h1]
-            val2 = self.data[jour2, h2]
-            
-            # Interpolation linéaire pour un flux continu "pro"
-            fraction = heure_float - h1
-            vector[i] = val1 + fraction * (val2 - val1)
-            
-        return vector
+    def _interpoler(self, minutes_semaine):
+        """
+        Linearly interpolate the hourly profile at whole minutes of the week.
+
+        Parameters
+        ----------
+        minutes_semaine : numpy.ndarray
+            (minutes de la semaine) Integer minutes since Monday 00:00, in [0, 10080), any shape.
+
+        Returns
+        -------
+        numpy.ndarray
+            (valeurs interpolées) Consumption values with the same shape as the input.
+        """
+        # Profil aplati en 168 heures (lundi 0h ... dimanche 23h) : l'heure suivant dimanche 23h est lundi 0h
+        profil = self.data.ravel()
+        h1 = minutes_semaine // 60
+        val1 = profil[h1]
+        val2 = profil[(h1 + 1) % profil.size]
+        # Interpolation linéaire pour un flux continu "pro"
+        fraction = (minutes_semaine % 60) / 60.0
+        return val1 + fraction * (val2 - val1)
     
     def __repr__(self) :
         """
@@ -176,6 +252,8 @@ class Constraints:
     minimum_temperature : float
         (température minimale) Lower bound for allowed water temperature.
     """
+    __slots__ = ('_consumption_profile', '_forbidden_slots', '_minimum_temperature')
+
     def __init__(self, consumption_profile: ConsumptionProfile = None, 
                  forbidden_slots : List[TimeSlot] = None, 
                  minimum_temperature = 10.0, 
@@ -429,6 +507,26 @@ class Constraints:
                 return False 
         
         return True
+
+    def allowed_mask(self, start_date : datetime, N : int, step_min : float) -> np.ndarray:
+        """
+        Flag the points of a horizon at which heating is allowed, vectorized form of is_allowed.
+
+        Parameters
+        ----------
+        start_date : datetime.datetime
+            (date de départ) Reference datetime for the first point.
+        N : int
+            (nombre de points) Number of points of the horizon.
+        step_min : float
+            (pas en minutes) Time step between points, expressed in minutes.
+
+        Returns
+        -------
+        numpy.ndarray
+            (masque d'autorisation) Boolean array of length N, False where point i is in a forbidden slot.
+        """
+        return ~_masque_creneaux(self._forbidden_slots, _instants_jour(start_date, N, step_min))
         
     def __repr__(self):
         """
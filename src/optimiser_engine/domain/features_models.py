@@ -32,6 +32,8 @@ class Features :
     mode : OptimizationMode
         (mode d'optimisation) Selected optimisation objective.
     """
+    __slots__ = ('_gradation', '_mode')
+
     def __init__(self, gradation : bool, mode: OptimizationMode) :
         """
         Initialize feature flags for a client.
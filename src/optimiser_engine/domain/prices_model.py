@@ -3,8 +3,9 @@
 Author: @anaselb
 """
 from typing import List
-from .common import TimeSlot 
+from .common import TimeSlot, _instants_jour, _masque_creneaux
 from datetime import time 
+import numpy as np
 # 1. On définit une exception levée si appel à un paramètre du mode incompatible. 
 class ModeIncompatibleError(Exception):
     """
@@ -31,6 +32,8 @@ class Prices:
     hp_slots : list
         (créneaux HP) List of TimeSlot instances defining peak hours in HPHC mode.
     """
+    __slots__ = ('_mode', '_hp', '_hc', '_base', '_resale_price', '_hp_slots')
+
     def __init__(self, mode = None):
         """
         Initialize pricing with sensible defaults for both tariff modes.
@@ -395,6 +398,51 @@ class Prices:
             
             #Si on donne exactement l'instant de début d'une creuse elle renvoit le tarif HC. 
 
+    def hp_mask(self, start_date, N : int, step_min : float) -> np.ndarray:
+        """
+        Flag the points of a horizon that fall in a peak-hour slot.
+
+        Parameters
+        ----------
+        start_date : datetime.datetime
+            (date de départ) Reference datetime for the first point.
+        N : int
+            (nombre de points) Number of points of the horizon.
+        step_min : float
+            (pas en minutes) Time step between points, expressed in minutes.
+
+        Returns
+        -------
+        numpy.ndarray
+            (masque HP) Boolean array of length N, True where point i is in HP (always False in BASE mode).
+        """
+        if self._mode != "HPHC":
+            return np.zeros(N, dtype=bool)
+        # Même règle que get_current_purchase_price : début inclus, fin exclue
+        return _masque_creneaux(self._hp_slots, _instants_jour(start_date, N, step_min))
+
+    def get_purchase_vector(self, start_date, N : int, step_min : float) -> np.ndarray:
+        """
+        Purchase price of each point of a horizon, vectorized form of get_current_purchase_price.
+
+        Parameters
+        ----------
+        start_date : datetime.datetime
+            (date de départ) Reference datetime for the first point.
+        N : int
+            (nombre de points) Number of points of the horizon.
+        step_min : float
+            (pas en minutes) Time step between points, expressed in minutes.
+
+        Returns
+        -------
+        numpy.ndarray
+            (prix d'achat) Tariff applicable at each point.
+        """
+        if self._mode == "BASE":
+            return np.full(N, self._base, dtype=float)
+        return np.where(self.hp_mask(start_date, N, step_min), self._hp, self._hc).astype(float)
+
     def __repr__(self) :
         """
         Return a human-readable description of the prices.
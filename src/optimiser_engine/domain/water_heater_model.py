@@ -18,6 +18,8 @@ class WaterHeater :
     cold_water_temperature : float
         (température eau froide) Inlet cold water temperature in degrees Celsius.
     """
+    __slots__ = ('_volume', '_power', '_insulation_coefficient', '_cold_water_temperature')
+
     def __init__(self, volume, power) :
         """
         Initialize the water heater with the given volume and power ratings.
@@ -5,7 +5,7 @@ Author: @anaselb
 
 
 
-from datetime import datetime, timedelta
+from datetime import datetime
 from types import NoneType
 import numpy as np 
 from ...domain import Client 
@@ -645,36 +645,14 @@ class ExternalContext :
                 # On prend la température la plus exigeante (future_setpoints_vec contient déjà la t_minimale) 
                 future_setpoints_vec[idx] = max(future_setpoints_vec[idx], evt.temperature) 
         
-        #5. availability :
-        tab_availability = np.zeros(N) 
-
-        for i in range(N):
-            #Le temps à i est dt_i = date_actuelle + i*time_step_minutes. 
-            dt_i = reference_datetime + timedelta(minutes=i * time_step_minutes)
-            t_i = dt_i.time() 
-            a = client.prices.get_current_purchase_price(t_i) 
-            prices[i] = a 
-
-            #On checke si dti = reference_datetime + i*pas tombe dans true ou bien false. 
-            is_allowed = client.constraints.is_allowed(t_i) 
-            if is_allowed :
-                tab_availability[i] = 1 
+        #5. availability / prix d'achat :
+        # Masques calculés d'un bloc sur tout l'horizon (instant i = reference_datetime + i*time_step_minutes)
+        prices[:] = client.prices.get_purchase_vector(reference_datetime, N, time_step_minutes)
+        tab_availability = client.constraints.allowed_mask(reference_datetime, N, time_step_minutes).astype(float)
+
         #6. Construction de off_peak_hours : 
-        # Par défaut, on initialise à 1 (Le courant passe partout, correspond au mode BASE)
-        off_peak_hours = np.ones(N) 
-        
-        # Si on est en HPHC, on vient "sculpter" les trous (les 0) correspondant aux Heures Pleines
-        if client.prices.mode == "HPHC":
-            hp_slots = client.prices.hp_slots
-            for i in range(N):
-                dt_i = reference_datetime + timedelta(minutes=i * time_step_minutes)
-                t_i = dt_i.time()
-                
-                # Vérification si l'instant t est dans un créneau HP
-                is_peak_hour = any(c.start <= t_i < c.end for c in hp_slots)
-                
-                if is_peak_hour:
-                    off_peak_hours[i] = 0 # Le contacteur est ouvert (coupure)
+        # 1 partout (le courant passe, mode BASE) ; en HPHC, 0 dans les Heures Pleines (le contacteur est ouvert)
+        off_peak_hours = np.where(client.prices.hp_mask(reference_datetime, N, time_step_minutes), 0.0, 1.0)
 
         A = cls(N,
                 time_step_minutes, 
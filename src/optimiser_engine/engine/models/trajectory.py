@@ -39,6 +39,44 @@ class RouterMode(Enum):
     COMFORT = "Confort (Solaire + Appoint Nuit)"    # Solaire le jour + Complément réseau en Heures Creuses si nécessaire.
 
 
+def _propager_temperatures(T_init, rho_vec, gains, T_cold) :
+    """
+    Propagate the tank temperature over the horizon without a Python loop.
+
+    Parameters
+    ----------
+    T_init : float
+        (température initiale) Starting water temperature in Celsius.
+    rho_vec : numpy.ndarray
+        (tirages) Fraction of the tank drawn at each step.
+    gains : numpy.ndarray
+        (gains) Heating gain minus losses at each step, in °C.
+    T_cold : float
+        (eau froide) Cold water temperature, lower bound of the tank temperature.
+
+    Returns
+    -------
+    numpy.ndarray
+        (températures) Temperatures for each step including the initial point.
+    """
+    # En écart à l'eau froide u = T - T_cold, la récurrence devient u_{t+1} = max(a_t*u_t + g_t, 0)
+    # avec a_t = 1 - rho_t. En divisant par P_{t+1} = a_0*...*a_t, on obtient une récurrence de Lindley
+    # v_{t+1} = max(v_t + g_t/P_{t+1}, 0), résolue par une somme cumulée et un minimum cumulé.
+    N = len(gains)
+    a = 1.0 - rho_vec
+    P = np.cumprod(a)
+    u = np.empty(N + 1)
+    u[0] = T_init - T_cold
+    if N > 0 and np.all(a > 0) and P[-1] > 1e-200 :
+        S = np.cumsum(gains / P)
+        u[1:] = P * (S - np.minimum(np.minimum.accumulate(S), -u[0]))
+    else :
+        # Tirage total ou non physique (a_t <= 0) : on garde la simulation pas à pas.
+        for t in range(N) :
+            u[t+1] = max(a[t] * u[t] + gains[t], 0.0)
+    return u + T_cold
+
+
 class TrajectorySystem :
     """
     Represents a complete optimisation trajectory, including decisions and resulting flows.
@@ -213,18 +251,18 @@ class TrajectorySystem :
         if len(valeur) != N :
             raise DimensionNotRespected(f"Le vecteur à mettre dans x doit être de taille {N}") 
         
-        #Vérification du contenu de valeur : 
-        for i in range(N) : 
-            if valeur[i] > 1 or valeur[i] <0 :
-                raise ValueError("Les élements du tableau de x ne doivent pas sortir de l'intervalle [0,1]") 
+        #Vérification du contenu de valeur (sur tout le tableau d'un coup) :
+        if np.any((valeur > 1) | (valeur < 0)) :
+            raise ValueError("Les élements du tableau de x ne doivent pas sortir de l'intervalle [0,1]")
         #Vérification du respect du mode non-gradation :
         if self.config_system.is_gradation == False :
-            for i in range(N) :
-                if valeur[i] != 0 and valeur[i] != 1 :
-                    raise ValueError("En cas d'absence du mode gradation, les valeur de x ne doivent pas être différents de 0 ou 1")
+            if np.any((valeur != 0) & (valeur != 1)) :
+                raise ValueError("En cas d'absence du mode gradation, les valeur de x ne doivent pas être différents de 0 ou 1")
         
-        a = np.full(3*N+1, np.nan, dtype=float)  
-        self._X = np.concatenate((valeur.astype(float), a))
+        # Un seul tampon [x, T, I, E] : les parties T, I, E restent vides (np.nan) jusqu'à update_X()
+        X = np.full(4*N+1, np.nan, dtype=float)
+        X[0:N] = valeur
+        self._X = X
         self._cost = None 
         self._self_consumption = None 
         warnings.warn("La partie décisions (x) du vecteur objectif X a été modifiée avec succès. " \
@@ -335,19 +373,23 @@ class TrajectorySystem :
         N = self.context.N
         step_min = self.context.step_minutes # On récupère le pas (ex: 15)
         
+        # On réutilise le tampon X [x, T, I, E] en place ; on n'en alloue un neuf que s'il n'a pas la bonne forme.
+        X = self._X
+        if X.dtype != np.float64 or len(X) != 4*N+1 :
+            X = np.empty(4*N+1)
+            X[0:N] = self._X[0:N]
+        
         # On extrait le vecteur de pilotage x (les N premiers éléments de X)
-        x_decisions = self._X[0:N]
+        x_decisions = X[0:N]
         
         # --- A. CALCUL ÉLECTRIQUE (Vectorisé - Ne change pas) ---
         puissance_W = x_decisions * self.config_system.power
         p_net = self.context.house_consumption - self.context.solar_production + puissance_W
-        I_vec = np.maximum(0, p_net)
-        E_vec = np.maximum(0, -p_net)
-        
-        # --- B. CALCUL THERMIQUE (Boucle de simulation) ---
-        T_vec = np.zeros(N + 1)
-        T_vec[0] = self.initial_temperature
+        np.maximum(0, p_net, out=X[2*N+1:3*N+1])
+        np.negative(p_net, out=p_net)
+        np.maximum(0, p_net, out=X[3*N+1:4*N+1])
         
+        # --- B. CALCUL THERMIQUE (Vectorisé) ---
         # Préparation des constantes
         V = self.config_system.volume
         Cp = 4185 
@@ -361,21 +403,14 @@ class TrajectorySystem :
         
         T_cold = self.config_system.T_cold_water
         rho_vec = self.context.water_draws / V
-        
-        for t in range(N):
-            T_prev = T_vec[t]
-            rho = rho_vec[t]
-            x_val = x_decisions[t]
-            
-            # Formule linéaire : Mélange + Chauffe - Pertes du pas
-            T_next = T_prev * (1 - rho) + (rho * T_cold) + (K_gain * x_val) - loss_per_step
-            
-            # Sécurité physique (L'eau ne descend pas en dessous de l'eau froide)
-            T_vec[t+1] = max(T_next, T_cold)
-            
+
+        # Formule linéaire : Mélange + Chauffe - Pertes du pas,
+        # avec la sécurité physique (L'eau ne descend pas en dessous de l'eau froide)
+        X[N:2*N+1] = _propager_temperatures(self.initial_temperature, rho_vec, K_gain * x_decisions - loss_per_step, T_cold)
+
         # --- C. ASSEMBLAGE ET NETTOYAGE ---
-        # On concatène pour former le vecteur X complet [x, T, I, E]
-        self._X = np.concatenate((x_decisions, T_vec, I_vec, E_vec))
+        # Les parties T, I, E ont été écrites directement dans X [x, T, I, E]
+        self._X = X
         
         # On invalide les caches de coût et d'autoconsommation pour forcer le recalcul
         self._cost = None
@@ -416,7 +451,7 @@ class TrajectorySystem :
         Returns
         -------
         None
-            (aucun retour) Stores the provided vector and clears cached metrics.
+            (aucun retour) Stores a copy of the provided vector and clears cached metrics.
 
         Raises
         ------
@@ -442,7 +477,9 @@ class TrajectorySystem :
             raise DimensionNotRespected(f"La dimension de X doit être 4x{N}+1 soit {4*N+1}") 
         
         #Maintenant tout est vérifié : 
-        self._X = x 
+        # Copie dans un tampon propre à la trajectoire : update_X() réécrit X en place,
+        # il ne doit pas modifier le tableau de l'appelant (par exemple res.x du solveur)
+        self._X = np.array(x, dtype=np.float64)
         self._cost = None
         self._self_consumption = None 
 
@@ -908,11 +945,17 @@ class TrajectorySystem :
             setpoint_temperature = config_system.T_max_safe 
 
         # --- 2. Boucle de Simulation (Causalité) ---
-        x_vec = np.zeros(N)
-        T_vec = np.zeros(N + 1)
+        # x et T sont des vues sur le futur vecteur X [x, T, I, E], rempli sans concaténation
+        X = np.zeros(4*N+1)
+        x_vec = X[0:N]
+        T_vec = X[N:2*N+1]
         
         current_temperature = initial_temperature
         T_vec[0] = current_temperature
+
+        # Le mode et les pertes ne dépendent pas du pas : évalués une seule fois, hors de la boucle
+        appoint_reseau = router_mode == RouterMode.COMFORT
+        loss_per_step = heat_loss_coefficient * context.step_minutes
         
         for t in range(N):
             # --- A. LOGIQUE DÉCISIONNELLE DU ROUTEUR ---
@@ -934,7 +977,7 @@ class TrajectorySystem :
                 
                 # 3. Stratégie Appoint Réseau (Mode Confort uniquement)
                 x_backup = 0.0
-                if router_mode == RouterMode.COMFORT:
+                if appoint_reseau:
                     # Si on est en Heures Creuses (Signal=1) ET qu'on a besoin de chauffer
                     is_hc = (grid_signal[t] == 1)
                     if is_hc:
@@ -952,7 +995,6 @@ class TrajectorySystem :
             # --- B. CALCUL PHYSIQUE (Mise à jour de T pour t+1) ---
             rho = rho_vec[t]
             
-            loss_per_step = heat_loss_coefficient * context.step_minutes
             T_next = current_temperature * (1 - rho) + (rho * T_cold) + (K_gain * x_decision) - loss_per_step
     
             current_temperature = max(T_next, T_cold)
@@ -967,14 +1009,14 @@ class TrajectorySystem :
         # (Si le CE consomme exactement le surplus, p_net sera proche de 0)
         p_net = house_consumption_vector - solar_production_vector + puissance_ce_W
         
-        I_vec = np.maximum(0, p_net)  # Importation (Achat réseau)
-        E_vec = np.maximum(0, -p_net) # Exportation (Injection réseau)
+        np.maximum(0, p_net, out=X[2*N+1:3*N+1])  # Importation (Achat réseau)
+        np.maximum(0, -p_net, out=X[3*N+1:4*N+1]) # Exportation (Injection réseau)
         
         # Instanciation vide pour éviter le setter public
         traj = cls(config_system, context, initial_temperature)
         
         # Injection directe dans les "tripes" de l'objet
-        traj._X = np.concatenate((x_vec, T_vec, I_vec, E_vec))
+        traj._X = X
         
         # Note : On ne lance pas update_X() car on vient de faire tous les calculs nous-mêmes.
         return traj 
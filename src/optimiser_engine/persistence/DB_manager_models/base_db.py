@@ -1,9 +1,334 @@
+import io
+import json
+import logging
 import sqlite3
 import os
-from datetime import datetime
+import threading
+import weakref
+from contextlib import contextmanager, nullcontext
+from itertools import groupby
+from operator import itemgetter
+from datetime import datetime, time, timedelta, timezone
+from functools import lru_cache
+import numpy as np
 from .exceptions_db import *
 
+logger = logging.getLogger(__name__)
+
+
+#########################################################################
+#  Conversion des tableaux numpy, faite par sqlite3 lui-même :
+#  - à l'écriture, tout np.ndarray lié à une requête est sérialisé au format NPY (adaptateur) ;
+#  - à la lecture, toute colonne déclarée NPARRAY est relue en np.ndarray (convertisseur,
+#    actif grâce à detect_types=PARSE_DECLTYPES dans connect_db).
+#########################################################################
+
+def _np_to_blob(matrice : np.ndarray) -> bytes :
+    """Sérialise un tableau au format NPY (binaire, dtype et forme inclus).
+    Stocké en float32 : deux fois moins d'octets, précision largement suffisante pour des puissances."""
+    buffer = io.BytesIO()
+    np.save(buffer, matrice.astype(np.float32, copy=False), allow_pickle=False)
+    return buffer.getvalue()
+
+def _blob_to_np(blob : bytes) -> np.ndarray :
+    """Relit un tableau NPY stocké en BDD (float32, voir _np_to_blob)."""
+    return np.load(io.BytesIO(blob), allow_pickle=False)
+
+sqlite3.register_adapter(np.ndarray, _np_to_blob)
+sqlite3.register_converter("NPARRAY", _blob_to_np)
+
+
+#########################################################################
+#  Dates des décisions : microsecondes entières depuis 1970-01-01 00:00 (INTEGER) :
+#  comparaisons numériques dans SQLite et aucun parsing de texte ISO 8601 à la lecture.
+#  La précision de datetime est conservée : deux décisions dans la même seconde restent distinctes.
+#  Une date naïve est prise telle quelle (heure murale, sans passer par le fuseau local) ;
+#  une date avec fuseau est convertie en UTC (calcul exact, sans passer par un float).
+#########################################################################
+
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_UNE_MICROSECONDE = timedelta(microseconds=1)
+
+def _to_us(date: datetime) -> int:
+    if date.tzinfo is not None:
+        return (date - _EPOCH_UTC) // _UNE_MICROSECONDE
+    return (date - _EPOCH) // _UNE_MICROSECONDE
+
+def _from_us(microsecondes: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=microsecondes)
+
+
+#########################################################################
+#  Schéma (DDL) : constantes du module, construites une seule fois
+#########################################################################
+
+# Basée sur le fichier client_models/client.py et client_models/features_models.py
+SQL_CLIENTS = """
+CREATE TABLE IF NOT EXISTS clients (
+    client_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    gradation INTEGER DEFAULT 0,
+    mode TEXT DEFAULT 'AutoCons',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    CHECK (mode IN ('AutoCons', 'cost')),
+    CHECK (gradation IN (0, 1))
+);"""
+
+# Basée sur le fichier client_models/constraints.py
+# Le profil de consommation 7x24 est stocké en binaire au format NPY (np.save) en float32, sans passer par du JSON ;
+# le type NPARRAY fait relire la colonne directement en np.ndarray (voir _blob_to_np)
+SQL_CONSTRAINTS = """
+CREATE TABLE IF NOT EXISTS constraints (
+    constraint_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    client_id INTEGER,
+    temperature_minimale REAL DEFAULT 10.0,
+    profil_conso_npy NPARRAY,
+
+    FOREIGN KEY (client_id) REFERENCES clients(client_id) ON DELETE CASCADE,
+    UNIQUE (client_id),
+    CHECK (temperature_minimale > 0 AND temperature_minimale < 95)
+);"""
+
+# Basée sur le fichier client_models/common.py
+# Les heures sont stockées en minutes depuis minuit (INTEGER 0-1440).
+SQL_PLAGES_INTERDITES = """
+CREATE TABLE IF NOT EXISTS plages_interdites (
+    plage_interdite_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    client_id INTEGER,
+    heure_debut INTEGER NOT NULL,
+    heure_fin INTEGER NOT NULL,
+
+    FOREIGN KEY (client_id) REFERENCES clients(client_id) ON DELETE CASCADE,
+    UNIQUE (client_id, heure_debut, heure_fin),
+    CHECK (heure_debut >= 0 AND heure_fin <= 1440 AND heure_debut < heure_fin)
+);"""
+
+# Basée sur le fichier client_models/water_heaters.py
+SQL_WATER_HEATERS = """
+CREATE TABLE IF NOT EXISTS water_heaters (
+    water_heater_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    client_id INTEGER,
+    volume REAL NOT NULL,
+    power REAL NOT NULL,
+    coeff_isolation REAL DEFAULT 0.0,
+    temperature_eau_froide_celsius REAL DEFAULT 10.0,
+
+    FOREIGN KEY (client_id) REFERENCES clients(client_id) ON DELETE CASCADE,
+    UNIQUE (client_id),
+    CHECK (volume > 0),
+    CHECK (power > 0)
+);"""
+
+# Basée sur le fichier client_models/consignes_models.py
+# WITHOUT ROWID : la clé (client_id, day, moment) est l'index clusterisé de la table
+# L'heure de la consigne (moment) est stockée en minutes depuis minuit, comme les créneaux
+SQL_CONSIGNES = """
+CREATE TABLE IF NOT EXISTS consignes (
+    client_id INTEGER NOT NULL,
+    day INTEGER NOT NULL,
+    moment INTEGER NOT NULL,
+    temperature REAL,
+    volume REAL DEFAULT 30.0,
+
+    PRIMARY KEY (client_id, day, moment),
+    FOREIGN KEY (client_id) REFERENCES clients(client_id) ON DELETE CASCADE,
+    CHECK (day >= 0 AND day <= 6),
+    CHECK (moment >= 0 AND moment < 1440),
+    CHECK (temperature >= 30 AND temperature <= 99),
+    CHECK (volume > 0)
+) WITHOUT ROWID;"""
+
+# Basée sur le fichier client_models/prices_model.py
+# Les heures sont stockées en minutes depuis minuit (INTEGER 0-1440).
+SQL_CRENEAUX_HP = """
+CREATE TABLE IF NOT EXISTS creneaux_hp (
+    creneau_hp_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    client_id INTEGER,
+    heure_debut INTEGER NOT NULL,
+    heure_fin INTEGER NOT NULL,
+
+    FOREIGN KEY (client_id) REFERENCES clients(client_id) ON DELETE CASCADE,
+    UNIQUE (client_id, heure_debut, heure_fin),
+    CHECK (heure_debut >= 0 AND heure_fin <= 1440 AND heure_debut < heure_fin)
+);"""
+
+# Prix de l'énergie, basée sur le fichier client_models/prices_model.py
+# WITHOUT ROWID : la clé (client_id, type) est l'index clusterisé de la table
+SQL_PRICES = """
+CREATE TABLE IF NOT EXISTS prices (
+    client_id INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    prix REAL NOT NULL,
+
+    PRIMARY KEY (client_id, type),
+    FOREIGN KEY (client_id) REFERENCES clients(client_id) ON DELETE CASCADE,
+    CHECK (type IN ('base', 'hp', 'hc', 'revente')),
+    CHECK (prix >= 0)
+) WITHOUT ROWID;"""
+
+# Stockage des décisions
+# WITHOUT ROWID : la clé (client_id, date) est l'index clusterisé de la table. Les lectures d'un client
+# (ou d'une période) et la suppression par (client_id, date) sont une seule recherche dans le B-tree,
+# qui contient aussi la puissance, et l'ORDER BY date est servi par l'ordre de la clé.
+# La date est stockée en microsecondes depuis 1970-01-01 (INTEGER), voir _to_us
+SQL_DECISIONS = """
+CREATE TABLE IF NOT EXISTS decisions (
+    client_id INTEGER NOT NULL,
+    date INTEGER NOT NULL,
+    puissance REAL NOT NULL,
+
+    PRIMARY KEY (client_id, date),
+    FOREIGN KEY (client_id) REFERENCES clients(client_id) ON DELETE CASCADE,
+    CHECK (puissance >= 0)
+) WITHOUT ROWID;"""
+
+# Index pour améliorer les performances
+# Les lectures par client_id sont déjà couvertes sans index supplémentaire :
+# - consignes et prices : clé primaire (client_id, ...) ;
+# - constraints et water_heaters : index implicite de UNIQUE (client_id) ;
+# - plages_interdites et creneaux_hp : index implicite de UNIQUE (client_id, heure_debut, heure_fin),
+#   qui est couvrant (lecture des heures sans accès à la table) ;
+# - decisions : clé primaire (client_id, date).
+SQL_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_consignes_day ON consignes(day);
+CREATE INDEX IF NOT EXISTS idx_decisions_date ON decisions(date);"""
+
+# Ordre de création : la table clients doit exister avant les tables qui la référencent
+_ALL_DDL = (SQL_CLIENTS, SQL_CONSTRAINTS, SQL_WATER_HEATERS, SQL_CONSIGNES, SQL_CRENEAUX_HP,
+            SQL_PRICES, SQL_PLAGES_INTERDITES, SQL_DECISIONS, SQL_INDEX)
+# Version du schéma, enregistrée dans PRAGMA user_version (pour les migrations futures)
+#   1 : heures en minutes depuis minuit, profil_conso_npy au format NPY float32
+#   2 : profil_conso_npy déclaré NPARRAY (converti en np.ndarray par sqlite3)
+#   3 : consignes.moment en minutes depuis minuit (INTEGER)
+#   4 : decisions en WITHOUT ROWID, clé primaire (client_id, date)
+#   5 : decisions.date en microsecondes depuis 1970-01-01 (INTEGER)
+SCHEMA_VERSION = 5
+
+# Taille du cache de requêtes préparées de chaque connexion (128 par défaut dans sqlite3).
+# Les lectures par lot (reconstitute_clients) génèrent un texte SQL différent pour chaque taille
+# de lot ("IN (?, ?, ...)") : un cache large évite qu'elles évincent les requêtes fréquentes
+# (insertions/lectures de décisions), qui restent ainsi compilées une seule fois par connexion.
+TAILLE_CACHE_REQUETES = 1024
+
+# Le script complet s'exécute dans une seule transaction (un seul fsync pour tout le schéma)
+_SCRIPT_SCHEMA = ("BEGIN;\n" + "\n".join(_ALL_DDL)
+                  + f"\nPRAGMA user_version = {SCHEMA_VERSION};\nCOMMIT;")
+
+
+
+#########################################################################
+#  Migrations : mise à niveau d'un fichier créé par une version antérieure du schéma
+#########################################################################
+
+# Tables dont la définition a changé depuis le schéma d'origine (sans user_version) : elles sont
+# reconstruites (nouvelle table, copie convertie, DROP de l'ancienne, RENAME), avec pour chaque colonne
+# convertie les colonnes sources possibles et la fonction SQL de conversion (voir _FONCTIONS_MIGRATION).
+# clients et water_heaters n'ont pas changé.
+_TABLES_A_MIGRER = {
+    "constraints": (SQL_CONSTRAINTS, {
+        "profil_conso_npy": (("profil_conso_npy", "profil_conso_json"), "_profil_vers_npy")}),
+    "plages_interdites": (SQL_PLAGES_INTERDITES, {
+        "heure_debut": (("heure_debut",), "_heure_vers_minutes"),
+        "heure_fin": (("heure_fin",), "_heure_vers_minutes")}),
+    "consignes": (SQL_CONSIGNES, {
+        "moment": (("moment",), "_heure_vers_minutes")}),
+    "creneaux_hp": (SQL_CRENEAUX_HP, {
+        "heure_debut": (("heure_debut",), "_heure_vers_minutes"),
+        "heure_fin": (("heure_fin",), "_heure_vers_minutes")}),
+    "prices": (SQL_PRICES, {}),
+    "decisions": (SQL_DECISIONS, {
+        "date": (("date",), "_date_vers_stockage")}),
+}
+
+# Index du schéma d'origine, couverts depuis par les clés et les contraintes UNIQUE
+_INDEX_OBSOLETES = ("idx_constraints_client", "idx_water_heaters_client", "idx_consignes_client",
+                    "idx_plages_client", "idx_prices_client", "idx_creneaux_hp_client", "idx_decisions_client")
+
+# Étapes de migration des données sans changement de structure : version de départ -> requêtes
+# qui amènent un fichier de cette version à la suivante
+_ETAPES_MIGRATION = {}
+
+def _heure_vers_minutes(valeur):
+    """Heure ISO ('HH:MM[:SS]') du schéma d'origine -> minutes depuis minuit ; un entier est déjà converti."""
+    if isinstance(valeur, str):
+        moment = time.fromisoformat(valeur)
+        return moment.hour * 60 + moment.minute
+    return valeur
+
+def _profil_vers_npy(valeur):
+    """Profil JSON (liste de listes) du schéma d'origine -> NPY float32 ; un BLOB est déjà converti."""
+    if isinstance(valeur, str):
+        return _np_to_blob(np.array(json.loads(valeur), dtype=float))
+    return valeur
+
+def _date_vers_stockage(valeur):
+    """Date ISO 8601 du schéma d'origine -> représentation stockée (voir _to_us) ; un entier est déjà converti."""
+    if isinstance(valeur, str):
+        return _to_us(datetime.fromisoformat(valeur))
+    return valeur
+
+_FONCTIONS_MIGRATION = {fonction.__name__: fonction
+                        for fonction in (_heure_vers_minutes, _profil_vers_npy, _date_vers_stockage)}
+
+# Instructions du schéma une par une (pour les exécuter dans la transaction de migration)
+_INSTRUCTIONS_SCHEMA = tuple(instruction.strip() for ddl in _ALL_DDL
+                             for instruction in ddl.split(";") if instruction.strip())
+
+# Structure d'un fichier : (table, colonne, type déclaré, NOT NULL, position dans la clé, WITHOUT ROWID)
+SQL_STRUCTURE = f"""
+SELECT m.name, p.name, p.type, p."notnull", p.pk, instr(m.sql, 'WITHOUT ROWID') > 0
+FROM sqlite_master m, pragma_table_info(m.name) p
+WHERE m.type = 'table' AND m.name IN ({", ".join(f"'{t}'" for t in ("clients", "water_heaters", *_TABLES_A_MIGRER))})
+ORDER BY m.name, p.cid"""
+
+@lru_cache(maxsize=None)
+def _structure_attendue():
+    """Structure produite par le schéma courant, lue une seule fois sur une base en mémoire."""
+    connexion = sqlite3.connect(":memory:")
+    try:
+        connexion.executescript(_SCRIPT_SCHEMA)
+        return tuple(connexion.execute(SQL_STRUCTURE))
+    finally:
+        connexion.close()
+
+# PRAGMAs propres à chaque connexion (non persistés dans le fichier)
+SQL_PRAGMAS_CONNEXION = """
+PRAGMA foreign_keys = ON;
+PRAGMA synchronous = NORMAL;
+PRAGMA temp_store = MEMORY;
+PRAGMA cache_size = -64000;
+PRAGMA mmap_size = 268435456;
+PRAGMA journal_size_limit = 6144000;"""
+
+
+class _ConnexionThread:
+    """Connexion d'un thread, gardée dans son threading.local : à la fin du thread l'objet est libéré
+    et le finaliseur posé par Database.connect_db ferme la connexion."""
+    __slots__ = ("connexion", "generation", "__weakref__")
+
+    def __init__(self, connexion, generation):
+        self.connexion = connexion
+        self.generation = generation
+
+def _fermer_connexion_thread(connexions, verrou, connexion):
+    """Finaliseur : ferme la connexion d'un thread terminé, si close_db ne l'a pas déjà fait."""
+    with verrou:
+        if connexion not in connexions:
+            return
+        connexions.remove(connexion)
+    try:
+        connexion.close()
+    except sqlite3.Error:
+        logger.debug("Connexion d'un thread terminé déjà fermée")
+
 class Database:
+    # Fichiers déjà passés en WAL (le mode WAL est persistant : inutile de le redemander)
+    _wal_actif = set()
+    # Fichiers dont le schéma est à jour, partagés par toutes les instances (voir ensure_schema)
+    _schemas_prets = set()
+    _verrou_schema = threading.Lock()
+
     def __init__(self, chemin_db=None):
         """
         Initialise la classe Database
@@ -15,28 +340,55 @@ class Database:
         Raises :
         - DatabaseConnexionError : si accès impossible à la DB.
         """
-        if chemin_db is None:
-            # Chemin par défaut dans le répertoire courant
-            self.chemin_db = os.path.join(os.getcwd(), 'db_engine_sqlite.db')
-        else:
-            # Utiliser le chemin fourni
-            self.chemin_db = chemin_db
-        
-        # S'assurer que le chemin est absolu
-        if not os.path.isabs(self.chemin_db):
-            self.chemin_db = os.path.join(os.getcwd(), self.chemin_db)
+        # Chemin fourni ou chemin par défaut dans le répertoire courant, rendu absolu
+        # (sauf ':memory:', base en mémoire qui n'a pas de fichier)
+        chemin_db = chemin_db or 'db_engine_sqlite.db'
+        self.en_memoire = chemin_db == ':memory:'
+        self.chemin_db = chemin_db if self.en_memoire else os.path.abspath(chemin_db)
         
         # Extraire le nom du fichier pour les affichages
-        self.nom_fichier = os.path.basename(self.chemin_db)
-        self.dossier_parent = os.path.dirname(self.chemin_db)
+        self.dossier_parent, self.nom_fichier = os.path.split(self.chemin_db)
         
-        self.connexion = None
+        # Une connexion par thread (threading.local), gardée ouverte entre les appels :
+        # chaque thread a ses propres transactions, et le WAL laisse les lectures se faire en parallèle.
+        # Une base ':memory:' n'existe que dans sa connexion : elle est partagée par tous les threads.
+        self._local = threading.local()
+        self._connexion_memoire = None
+        # Toutes les connexions ouvertes (pour close_db) et génération courante : une connexion
+        # d'une génération antérieure a été fermée par close_db et sera rouverte au besoin.
+        # La connexion d'un thread est aussi fermée (et retirée de la liste) quand ce thread se termine.
+        self._connexions = []
+        self._generation = 0
+        self._verrou_connexions = threading.Lock()
+        # Schéma déjà vérifié pour ce fichier (voir ensure_schema)
+        self._schema_ready = False
+        # Verrou des écritures : la connexion peut être partagée entre threads (check_same_thread=False)
+        self._write_lock = threading.RLock()
         
         # Créer le dossier parent si nécessaire
-        if self.dossier_parent and not os.path.exists(self.dossier_parent):
-            os.makedirs(self.dossier_parent)
-            print(f"Dossier créé: {self.dossier_parent}")
+        if self.dossier_parent:
+            os.makedirs(self.dossier_parent, exist_ok=True)
     
+    @property
+    def connexion(self):
+        """Connexion du thread courant, ou None si elle n'est pas (ou plus) ouverte."""
+        if self.en_memoire:
+            return self._connexion_memoire
+        porteur = getattr(self._local, 'porteur', None)
+        if porteur is None or porteur.generation != self._generation:
+            return None
+        return porteur.connexion
+
+    @connexion.setter
+    def connexion(self, connexion):
+        if self.en_memoire:
+            self._connexion_memoire = connexion
+        else:
+            porteur = _ConnexionThread(connexion, self._generation)
+            # Libéré avec le threading.local à la fin du thread : la connexion est alors fermée
+            weakref.finalize(porteur, _fermer_connexion_thread, self._connexions, self._verrou_connexions, connexion)
+            self._local.porteur = porteur
+
     def obtenir_info_db(self):
         """Retourne des informations sur la base de données"""
         return {
@@ -49,269 +401,327 @@ class Database:
         }
     
     def connect_db(self):
-        """Établir une connexion à la base de données SQLite"""
+        """Établir une connexion à la base de données SQLite.
+        La connexion est conservée entre les appels : si elle est déjà ouverte, rien n'est refait."""
+        if self.connexion is not None:
+            return True
+        # Base neuve (fichier absent ou vide) : la taille de page n'est modifiable qu'avant la première écriture
+        nouvelle_db = self.en_memoire or not os.path.exists(self.chemin_db) or os.path.getsize(self.chemin_db) == 0
         try:
-            self.connexion = sqlite3.connect(self.chemin_db)
+            # Cache de requêtes préparées élargi (voir TAILLE_CACHE_REQUETES)
+            connexion = sqlite3.connect(self.chemin_db, check_same_thread=False,
+                                        cached_statements=TAILLE_CACHE_REQUETES,
+                                        detect_types=sqlite3.PARSE_DECLTYPES)
         except sqlite3.OperationalError:
             raise DatabaseConnexionError("Impossible de se connecter à la base de données.")
-        self.connexion.execute("PRAGMA foreign_keys = ON")  # Activer les clés étrangères
-        # print(f"Connecté à la base de données: {self.chemin_db}")
+        with self._verrou_connexions:
+            self._connexions.append(connexion)
+        # Hors du verrou : remplacer la connexion périmée du thread déclenche son finaliseur, qui le prend
+        self.connexion = connexion
+        if nouvelle_db:
+            # Pages de 8 KiB : moins de pages de débordement pour les profils de consommation
+            # (doit précéder le passage en WAL)
+            self.connexion.execute("PRAGMA page_size = 8192")
+        if not self.en_memoire and (nouvelle_db or self.chemin_db not in Database._wal_actif):
+            # WAL : les lecteurs ne bloquent plus l'écrivain (reconstitute_client peut lire pendant
+            # un update_client_in_db), un seul fsync par transaction.
+            # Le mode crée deux fichiers à côté de la base : <nom>-wal et <nom>-shm.
+            self.connexion.execute("PRAGMA journal_mode = WAL")
+            Database._wal_actif.add(self.chemin_db)
+        if nouvelle_db:
+            # Fichier recréé : le schéma est à reconstruire
+            self._schema_ready = False
+            Database._schemas_prets.discard(self.chemin_db)
+        # Clés étrangères, synchronous=NORMAL (sûr en WAL), cache de 64 Mo, temporaires en mémoire,
+        # lectures par mmap (256 Mo)
+        self.connexion.executescript(SQL_PRAGMAS_CONNEXION)
+        logger.debug("Connecté à la base de données: %s", self.chemin_db)
         return True
         
     def close_db(self):
-        """Fermer la connexion à la base de données"""
-        if self.connexion:
+        """Fermer les connexions à la base de données (celles de tous les threads)"""
+        with self._verrou_connexions:
+            # Vidée sur place : la liste est partagée avec les finaliseurs des threads
+            connexions = list(self._connexions)
+            self._connexions.clear()
+            # Les connexions gardées par les autres threads deviennent périmées
+            self._generation += 1
+            self._connexion_memoire = None
+        for connexion in connexions:
             try:
-                self.connexion.close()
+                connexion.close()
             except sqlite3.ProgrammingError:
-                print("Connexion déjà fermée")
+                logger.debug("Connexion déjà fermée: %s", self.chemin_db)
             except sqlite3.OperationalError:
                 raise DatabaseConnexionError("Erreur lors de la déconnexion de la base de données.")
-            # print("Connexion fermée")
+        logger.debug("Connexions fermées: %s", self.chemin_db)
+
+    @contextmanager
+    def curseur(self, lignes_nommees=False):
+        """Ouvre la connexion si besoin et fournit un curseur, fermé à la sortie (y compris sur exception).
+        Args :
+        - lignes_nommees : bool (lignes en sqlite3.Row, indexables par nom de colonne ; tuples sinon)
+        Raises :
+        - DatabaseConnexionError : si accès impossible à la BDD.
+        """
+        try:
+            self.connect_db()
+        except DatabaseConnexionError:
+            raise DatabaseConnexionError(
+                f"Impossible de se connecter à la base de données.\n"
+                f"Chemin: {self.chemin_db}\n"
+            )
+        # Schéma créé ou migré au premier accès au fichier (ensuite un simple test de booléen)
+        self.ensure_schema()
+        curseur = self.connexion.cursor()
+        # Réglé sur le curseur et non sur la connexion, partagée par tous les appels du thread
+        if lignes_nommees:
+            curseur.row_factory = sqlite3.Row
+        try:
+            yield curseur
+        finally:
+            curseur.close()
+
+    @contextmanager
+    def transaction_ecriture(self):
+        """Regroupe des écritures dans une transaction BEGIN IMMEDIATE ... COMMIT (un seul commit) :
+        le verrou d'écriture est pris dès le début. Toute exception annule la transaction entière
+        (elle ne reste jamais ouverte sur la connexion conservée) puis est propagée.
+        _write_lock est tenu jusqu'au COMMIT : les threads qui partagent une connexion (base ':memory:')
+        n'entrelacent pas leurs transactions, et les écrivains d'un même processus s'attendent
+        au lieu d'échouer sur le verrou SQLite."""
+        with self._write_lock:
+            self.connexion.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+                self.connexion.commit() # Sauvegarder en disque
+            except BaseException:
+                if self.connexion.in_transaction:
+                    self.connexion.rollback()
+                raise
+
+    @contextmanager
+    def transaction_lecture(self):
+        """Regroupe plusieurs SELECT dans une transaction de lecture : en WAL elles lisent toutes
+        le même instantané de la BDD (une écriture concurrente ne peut pas s'intercaler entre elles).
+        Sans effet si une transaction est déjà ouverte sur la connexion.
+        Une base ':memory:' n'a qu'une connexion, partagée par les threads : la transaction y est
+        prise sous _write_lock pour ne pas s'entrelacer avec celles des autres threads."""
+        with self._write_lock if self.en_memoire else nullcontext():
+            if self.connexion.in_transaction:
+                yield
+                return
+            self.connexion.execute("BEGIN DEFERRED")
+            try:
+                yield
+            finally:
+                self.connexion.commit()
+
+    def bulk_insert(self, table, colonnes, lignes, ignorer_doublons=False):
+        """
+        Insère un lot de lignes en une seule requête préparée et une seule transaction.
+
+        Les appelants doivent accumuler leurs lignes (liste ou générateur) puis appeler
+        cette méthode une seule fois, plutôt que de l'appeler dans une boucle.
+
+        Args :
+            table (str): Nom de la table cible
+            colonnes (tuple): Noms des colonnes renseignées
+            lignes (iterable): Tuples de valeurs, dans l'ordre de colonnes
+            ignorer_doublons (bool): Si True, utilise INSERT OR IGNORE
+
+        Returns :
+            int : nombre de lignes insérées
+
+        Raises :
+        - DatabaseConnexionError : si accès impossible à la BDD.
+        - DatabaseIntegrityError : si une ligne viole une contrainte (le lot est annulé).
+        """
+        marqueurs = ", ".join("?" * len(colonnes))
+        verbe = "INSERT OR IGNORE" if ignorer_doublons else "INSERT"
+        sql = f"{verbe} INTO {table} ({', '.join(colonnes)}) VALUES ({marqueurs})"
+        try:
+            # Connexion ouverte au besoin ; BEGIN IMMEDIATE ... COMMIT, ou ROLLBACK en cas d'erreur
+            with self.curseur() as curseur, self.transaction_ecriture():
+                curseur.executemany(sql, lignes)
+                return curseur.rowcount
+        except sqlite3.IntegrityError as e:
+            raise DatabaseIntegrityError(f"Insertion en lot impossible dans '{table}' : {e}")
 
     def _create_table_clients(self):
         """Créer la table basée sur le fichier client_models/client.py et client_models/features_models.py"""
-        """Créer le schéma de la base de données en s'assurant d'être connecté"""
-        
-        sql = """
-        CREATE TABLE IF NOT EXISTS clients (
-            client_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            gradation INTEGER DEFAULT 0,
-            mode TEXT DEFAULT 'AutoCons',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            
-            CHECK (mode IN ('AutoCons', 'cost')),
-            CHECK (gradation IN (0, 1))
-        );
-        """
-        self.connexion.execute(sql)
-        self.connexion.commit()
-        # print("Table 'clients' créé")
+        self.connexion.execute(SQL_CLIENTS)
 
     def _create_table_constraints(self):
         """Créer la table basée sur le fichier client_models/constraints.py"""
-        # CORRECTION : On remplace 'puissance_maison' (REAL) par 'profil_conso_json' (TEXT)
-        sql = """
-        CREATE TABLE IF NOT EXISTS constraints (
-            constraint_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            client_id INTEGER,
-            temperature_minimale REAL DEFAULT 10.0,
-            profil_conso_json TEXT, 
-            
-            FOREIGN KEY (client_id) REFERENCES clients(client_id) ON DELETE CASCADE,
-            UNIQUE (client_id),
-            CHECK (temperature_minimale > 0 AND temperature_minimale < 95)
-        );
-        """
-        self.connexion.execute(sql)
-        self.connexion.commit()
-        # print("Table 'constraints' créé (Version JSON)")
+        self.connexion.execute(SQL_CONSTRAINTS)
 
     def _create_table_plages_interdites(self):
         """Créer la table basée sur le fichier client_models/common.py"""
-        sql = """
-        CREATE TABLE IF NOT EXISTS plages_interdites (
-            plage_interdite_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            client_id INTEGER,
-            heure_debut TEXT NOT NULL,
-            heure_fin TEXT NOT NULL,
-            
-            FOREIGN KEY (client_id) REFERENCES clients(client_id) ON DELETE CASCADE,
-            UNIQUE (client_id, heure_debut, heure_fin),
-            CHECK (heure_debut < heure_fin)
-        );
-        """
-        self.connexion.execute(sql)
-        # print("Table 'plages_interdites' créé")
-    
+        self.connexion.execute(SQL_PLAGES_INTERDITES)
+
     def _create_table_water_heaters(self):
         """Créer la table basée sur le fichier client_models/water_heaters.py"""
-        sql = """
-        CREATE TABLE IF NOT EXISTS water_heaters (
-            water_heater_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            client_id INTEGER,
-            volume REAL NOT NULL,
-            power REAL NOT NULL,
-            coeff_isolation REAL DEFAULT 0.0,
-            temperature_eau_froide_celsius REAL DEFAULT 10.0,
-            
-            FOREIGN KEY (client_id) REFERENCES clients(client_id) ON DELETE CASCADE,
-            UNIQUE (client_id),
-            CHECK (volume > 0),
-            CHECK (power > 0)
-        );
-        """
-        self.connexion.execute(sql)
-        self.connexion.commit()
-        # print("Table 'water_heaters' créé")
-    
+        self.connexion.execute(SQL_WATER_HEATERS)
+
     def _create_table_consignes(self):
         """Créer la table basée sur le fichier client_models/consignes_models.py"""
-        sql = """
-        CREATE TABLE IF NOT EXISTS consignes (
-            consigne_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            client_id INTEGER,
-            day INTEGER NOT NULL,
-            moment TEXT NOT NULL,
-            temperature REAL,
-            volume REAL DEFAULT 30.0,
-            
-            FOREIGN KEY (client_id) REFERENCES clients(client_id) ON DELETE CASCADE,
-            UNIQUE (client_id, day, moment),
-            CHECK (day >= 0 AND day <= 6),
-            CHECK (temperature >= 30 AND temperature <= 99),
-            CHECK (volume > 0)            
-        );
-        """
-        self.connexion.execute(sql)
-        self.connexion.commit()
-        # print("Table 'consignes' créé")
-    
+        self.connexion.execute(SQL_CONSIGNES)
+
     def _create_table_creneaux_hp(self):
         """Créer la table de creneaux_hp basée sur le fichier client_models/prices_model.py"""
-        sql = """
-        CREATE TABLE IF NOT EXISTS creneaux_hp (
-            creneau_hp_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            client_id INTEGER,
-            heure_debut TEXT,
-            heure_fin TEXT,
-            
-            FOREIGN KEY (client_id) REFERENCES clients(client_id) ON DELETE CASCADE,
-            UNIQUE (client_id, heure_debut, heure_fin)
-        );
-        """
-        self.connexion.execute(sql)
-        self.connexion.commit()
-        # print("Table 'creneaux_hp' créé")
-    
+        self.connexion.execute(SQL_CRENEAUX_HP)
+
     def _create_table_prices(self):
         """Créer la table prices de l'énergie basée sur le fichier client_models/prices_model.py"""
-        sql = """
-        CREATE TABLE IF NOT EXISTS prices (
-            client_id INTEGER,
-            type TEXT,
-            prix REAL NOT NULL,
-
-            PRIMARY KEY (client_id, type),
-            FOREIGN KEY (client_id) REFERENCES clients(client_id) ON DELETE CASCADE,
-            CHECK (type IN ('base', 'hp', 'hc', 'revente')),
-            CHECK (prix >= 0)
-        );
-        """
-        self.connexion.execute(sql)
-        self.connexion.commit()
-        # print("Table 'prices' créé")
+        self.connexion.execute(SQL_PRICES)
 
     def _create_table_decisions(self):
         """Créer la table pour stocker les décisions"""
-        sql = """
-        CREATE TABLE IF NOT EXISTS decisions (
-            decision_id INTEGER PRIMARY KEY AUTOINCREMENT,
-            client_id INTEGER,
-            date TEXT NOT NULL,
-            puissance REAL NOT NULL,
-            
-            FOREIGN KEY (client_id) REFERENCES clients(client_id) ON DELETE CASCADE,
-            UNIQUE (client_id, date),
-            CHECK (puissance >= 0)
-        );
-        """
-        self.connexion.execute(sql)
-        self.connexion.commit()
-        # print("Table 'decisions' créé")
-    
+        self.connexion.execute(SQL_DECISIONS)
+
     def _create_index(self):
         """Créer des index pour améliorer les performances"""
-        
-        index_liste = [            
-            # Table constraints
-            ("CREATE INDEX IF NOT EXISTS idx_constraints_client ON constraints(client_id)"),
-            
-            # Table water_heaters
-            ("CREATE INDEX IF NOT EXISTS idx_water_heaters_client ON water_heaters(client_id)"),
-            
-            # Table consignes
-            ("CREATE INDEX IF NOT EXISTS idx_consignes_client ON consignes(client_id)"),
-            ("CREATE INDEX IF NOT EXISTS idx_consignes_day ON consignes(day)"),
-            
-            # Table plages_interdites
-            ("CREATE INDEX IF NOT EXISTS idx_plages_client ON plages_interdites(client_id)"),
-
-            # Table prices
-            ("CREATE INDEX IF NOT EXISTS idx_prices_client ON prices(client_id)"),
-
-            # Table creneaux_hp
-            ("CREATE INDEX IF NOT EXISTS idx_creneaux_hp_client ON creneaux_hp(client_id)"),
-
-            # Table decisions
-            ("CREATE INDEX IF NOT EXISTS idx_decisions_client ON decisions(client_id)"),
-            ("CREATE INDEX IF NOT EXISTS idx_decisions_date ON decisions(date)")
-        ]
-        
-        for sql in index_liste:
-            self.connexion.execute(sql)
-        
-        self.connexion.commit()
-        # print("Index créés")
-    
+        self.connexion.executescript(SQL_INDEX)
+
     def verifier_structure(self):
         """Vérifier si toutes les tables ont été créés"""
-        curseur = self.connexion.cursor()
-        
-        # Lister toutes les tables
-        curseur.execute("SELECT name FROM sqlite_master WHERE type='table' ORDER BY name")
-        tables = curseur.fetchall()
+        # Une seule requête pour toutes les colonnes de toutes les tables (pragma en table-valued function)
+        colonnes = self.connexion.execute(
+            "SELECT m.name, p.name, p.type, p.pk "
+            "FROM sqlite_master m, pragma_table_info(m.name) p "
+            "WHERE m.type='table' ORDER BY m.name, p.cid").fetchall()
+        tables = [nom_table for nom_table, _ in groupby(colonnes, key=itemgetter(0))]
         
         print(f"\nStructure de la base '{self.chemin_db}':")
         print("=" * 60)
         
-        for table in tables:
-            nom_table = table[0]
-            curseur.execute(f"PRAGMA table_info({nom_table})")
-            colonnes = curseur.fetchall()
-            
+        for nom_table, colonnes_table in groupby(colonnes, key=itemgetter(0)):
             print(f"\nTable: {nom_table}")
             print("-" * 40)
-            for colonne in colonnes:
-                print(f"  {colonne[1]:20} {colonne[2]:10} {'PK' if colonne[5] else '':3}")
+            for _, nom, type_colonne, pk in colonnes_table:
+                print(f"  {nom:20} {type_colonne:10} {'PK' if pk else '':3}")
         
-        # Compter les enregistrements
+        # Compter les enregistrements (une seule requête UNION ALL)
         print("\nStatistiques:")
-        for table in tables:
-            curseur.execute(f"SELECT COUNT(*) FROM {table[0]}")
-            compte = curseur.fetchone()[0]
-            print(f"  {table[0]:20}: {compte:4} enregistrements")
+        if tables:
+            requete = " UNION ALL ".join(f"SELECT '{t}', COUNT(*) FROM \"{t}\"" for t in tables)
+            for nom_table, compte in self.connexion.execute(requete):
+                print(f"  {nom_table:20}: {compte:4} enregistrements")
         
         print("=" * 60)
 
     def create_all_tables(self):
-        """Créer le schéma de la base de données"""
-        
-        # 1. Table clients
-        self._create_table_clients()
-        
-        # 2. Table constraints
-        self._create_table_constraints()
-        
-        # 3. Table water_heaters
-        self._create_table_water_heaters()
-        
-        # 4. Table consignes
-        self._create_table_consignes()
-        
-        # 5. Table creneaux_hp
-        self._create_table_creneaux_hp()
-        
-        # 6. Table prices
-        self._create_table_prices()
-        
-        # 7. Table plages_interdites
-        self._create_table_plages_interdites()
-
-        # 8. Table de decisions
-        self._create_table_decisions()
-        
-        # 9. Créer les index
-        self._create_index()
-        
+        """Créer le schéma de la base de données (tables puis index) en un seul script.
+        Un fichier qui contient déjà des tables d'une version antérieure est migré (voir _migrer_schema)
+        au lieu d'être seulement marqué à la version courante."""
+        structure = tuple(self.connexion.execute(SQL_STRUCTURE))
+        if structure and structure != _structure_attendue():
+            self._migrer_schema()
+        else:
+            version = self.connexion.execute("PRAGMA user_version").fetchone()[0]
+            if structure and version < SCHEMA_VERSION:
+                # Même structure, données d'une version antérieure
+                self._migrer_schema(version)
+            else:
+                self.connexion.executescript(_SCRIPT_SCHEMA)
+        self._schema_ready = True
+        if not self.en_memoire:
+            Database._schemas_prets.add(self.chemin_db)
         # print("\nToutes les tables ont été créés avec succès!")
+
+    def _migrer_schema(self, version=None):
+        """Amène un fichier d'une version antérieure au schéma courant, dans une seule transaction.
+        Args :
+        - version : int (version de départ quand la structure est déjà la bonne : seules les étapes de
+          _ETAPES_MIGRATION sont appliquées ; None : les tables modifiées sont reconstruites)
+        Raises :
+        - DatabaseSchemaError : si le fichier ne peut pas être migré (la transaction est annulée).
+        """
+        connexion = self.connexion
+        for nom, fonction in _FONCTIONS_MIGRATION.items():
+            connexion.create_function(nom, 1, fonction, deterministic=True)
+        # Clés étrangères désactivées pendant la reconstruction (procédure recommandée par SQLite),
+        # vérifiées par foreign_key_check avant le commit
+        connexion.execute("PRAGMA foreign_keys = OFF")
+        try:
+            connexion.execute("BEGIN IMMEDIATE")
+            try:
+                if version is None:
+                    self._reconstruire_tables()
+                else:
+                    for etape in range(version, SCHEMA_VERSION):
+                        for requete in _ETAPES_MIGRATION.get(etape, ()):
+                            connexion.execute(requete)
+                if connexion.execute("PRAGMA foreign_key_check").fetchone() is not None:
+                    raise DatabaseSchemaError("Migration impossible : lignes sans client correspondant.")
+                if tuple(connexion.execute(SQL_STRUCTURE)) != _structure_attendue():
+                    raise DatabaseSchemaError("Migration impossible : structure de la base inattendue.")
+                connexion.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+                connexion.commit()
+            except (sqlite3.Error, ValueError) as e:
+                connexion.rollback()
+                raise DatabaseSchemaError(f"Migration du schéma impossible ({self.chemin_db}) : {e}")
+            except BaseException:
+                connexion.rollback()
+                raise
+        finally:
+            connexion.execute("PRAGMA foreign_keys = ON")
+        logger.info("Schéma migré à la version %s : %s", SCHEMA_VERSION, self.chemin_db)
+
+    def _reconstruire_tables(self):
+        """Reconstruit les tables de _TABLES_A_MIGRER présentes dans le fichier, en convertissant les
+        colonnes au format courant, puis crée les tables et index manquants. Dans la transaction de migration."""
+        connexion = self.connexion
+        existantes = {nom for (nom,) in connexion.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        for table, (ddl, conversions) in _TABLES_A_MIGRER.items():
+            if table not in existantes:
+                continue
+            anciennes = {ligne[1] for ligne in connexion.execute(f"PRAGMA table_info({table})")}
+            temporaire = f"{table}__migration"
+            connexion.execute(ddl.replace(f" {table} (", f" {temporaire} (", 1))
+            cibles, sources = [], []
+            for ligne in connexion.execute(f"PRAGMA table_info({temporaire})").fetchall():
+                colonne = ligne[1]
+                noms_sources, fonction = conversions.get(colonne, ((colonne,), None))
+                source = next((nom for nom in noms_sources if nom in anciennes), None)
+                if source is None:
+                    continue # Colonne nouvelle : valeur par défaut
+                cibles.append(colonne)
+                sources.append(f"{fonction}({source})" if fonction else source)
+            connexion.execute(f"INSERT INTO {temporaire} ({', '.join(cibles)}) "
+                              f"SELECT {', '.join(sources)} FROM {table}")
+            connexion.execute(f"DROP TABLE {table}")
+            connexion.execute(f"ALTER TABLE {temporaire} RENAME TO {table}")
+        for index in _INDEX_OBSOLETES:
+            connexion.execute(f"DROP INDEX IF EXISTS {index}")
+        # Tables absentes et index (CREATE ... IF NOT EXISTS)
+        for instruction in _INSTRUCTIONS_SCHEMA:
+            connexion.execute(instruction)
+
+    def ensure_schema(self):
+        """Créer ou migrer le schéma une seule fois par fichier : les appels suivants ne font plus aucun DDL,
+        y compris depuis les autres instances (managers) ouvertes sur le même fichier.
+        Un fichier n'est considéré à jour que si sa version (PRAGMA user_version) ET sa structure
+        correspondent au schéma courant ; sinon il est créé ou migré (voir create_all_tables).
+        Doit être appelé avec une connexion ouverte et hors transaction.
+        Raises :
+        - DatabaseSchemaError : si le fichier vient d'une version plus récente ou ne peut pas être migré.
+        """
+        if self._schema_ready:
+            return
+        with Database._verrou_schema:
+            if not self.en_memoire and self.chemin_db in Database._schemas_prets:
+                self._schema_ready = True
+                return
+            version = self.connexion.execute("PRAGMA user_version").fetchone()[0]
+            if version > SCHEMA_VERSION:
+                raise DatabaseSchemaError(
+                    f"La base {self.chemin_db} est à la version {version} du schéma, "
+                    f"plus récente que celle gérée ({SCHEMA_VERSION}).")
+            if version == SCHEMA_VERSION and tuple(self.connexion.execute(SQL_STRUCTURE)) == _structure_attendue():
+                self._schema_ready = True
+                if not self.en_memoire:
+                    Database._schemas_prets.add(self.chemin_db)
+            else:
+                self.create_all_tables()
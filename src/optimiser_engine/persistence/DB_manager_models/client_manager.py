@@ -3,30 +3,154 @@ Auteur : @laura-campelo
 
 """
 
-import sys
-from pathlib import Path
+import sqlite3
+import threading
+from collections import OrderedDict, defaultdict
+from datetime import time
 
-################LES IMPORTS AJOUTÉS : ###################################################################  
-import sys
-import json  # <--- AJOUTER CECI
-import numpy as np # <--- AJOUTER CECI
 from ...domain import Client, Features, Planning, Constraints, Prices, WaterHeater, Setpoint, TimeSlot, ConsumptionProfile, OptimizationMode
-########################################################################################################
-
-chemin_base = Path(__file__).parent.parent
-sys.path.append(str(chemin_base / 'client_models'))
 from .base_db import Database
-import sqlite3
-import os
-from datetime import datetime, time
-import copy
 from .exceptions_db import *
 
 
+def _to_min(moment : time) -> int :
+    """Convertit une heure (datetime.time) en minutes depuis minuit pour le stockage INTEGER."""
+    return moment.hour * 60 + moment.minute
+
+def _from_min(minutes : int) -> time :
+    """Convertit des minutes depuis minuit (valeur de la BDD) en datetime.time."""
+    return time(minutes // 60, minutes % 60)
+
+def _message_invalide(objet : str, operation : str = "de l'insertion") -> str :
+    """Message des ValueError levées quand une contrainte de la BDD est violée."""
+    return (f"Valeur invalide envoyée dans {objet}.\n"
+            f"Interruption complète {operation}.\n")
+
+
+#########################################################################
+#  Requêtes SQL : constantes du module (même objet réutilisé à chaque appel,
+#  ce qui garantit un hit dans le cache de requêtes préparées de sqlite3)
+#########################################################################
+
+# Insertions (create_client_in_db)
+SQL_INS_CLIENT = "INSERT INTO clients (client_id, gradation, mode) VALUES (?, ?, ?)"
+SQL_INS_CONSIGNE = "INSERT INTO consignes (client_id, day, moment, temperature, volume) VALUES (?, ?, ?, ?, ?)"
+SQL_INS_CONSTRAINT = "INSERT INTO constraints (client_id, temperature_minimale, profil_conso_npy) VALUES (?, ?, ?)"
+SQL_INS_PLAGE = "INSERT INTO plages_interdites (client_id, heure_debut, heure_fin) VALUES (?, ?, ?)"
+SQL_INS_PRICE = "INSERT INTO prices (client_id, type, prix) VALUES (?, ?, ?)"
+SQL_INS_HP = "INSERT INTO creneaux_hp (client_id, heure_debut, heure_fin) VALUES (?, ?, ?)"
+SQL_INS_WH = """INSERT INTO water_heaters
+    (client_id, volume, power, coeff_isolation, temperature_eau_froide_celsius)
+    VALUES (?, ?, ?, ?, ?)"""
+
+# Mises à jour (update_client_in_db)
+SQL_UPSERT_CLIENT = """INSERT INTO clients (client_id, gradation, mode) VALUES (?, ?, ?)
+    ON CONFLICT(client_id) DO UPDATE SET
+    gradation = excluded.gradation,
+    mode = excluded.mode"""
+SQL_UPSERT_CONSIGNE = """INSERT INTO consignes (client_id, day, moment, temperature, volume) VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(client_id, day, moment) DO UPDATE SET
+    temperature = excluded.temperature,
+    volume = excluded.volume"""
+SQL_UPSERT_CONSTRAINT = """INSERT INTO constraints (client_id, temperature_minimale, profil_conso_npy)
+    VALUES (?, ?, ?)
+    ON CONFLICT(client_id) DO UPDATE SET
+    temperature_minimale = excluded.temperature_minimale,
+    profil_conso_npy = excluded.profil_conso_npy"""
+SQL_UPSERT_WH = """INSERT INTO water_heaters
+    (client_id, volume, power, coeff_isolation, temperature_eau_froide_celsius)
+    VALUES (?, ?, ?, ?, ?) ON CONFLICT(client_id) DO UPDATE SET
+    volume = excluded.volume,
+    power = excluded.power,
+    coeff_isolation = excluded.coeff_isolation,
+    temperature_eau_froide_celsius = excluded.temperature_eau_froide_celsius"""
+
+# Suppressions
+SQL_DEL_CLIENT = "DELETE FROM clients WHERE client_id = ?"
+SQL_DEL_CONSIGNES = "DELETE FROM consignes WHERE client_id = ?"
+SQL_DEL_PLAGES = "DELETE FROM plages_interdites WHERE client_id = ?"
+SQL_DEL_HP = "DELETE FROM creneaux_hp WHERE client_id = ?"
+SQL_DEL_PRICES = "DELETE FROM prices WHERE client_id = ?"
+
+# Lectures (reconstitute_client, list_all_clients)
+# 1. Tables à une ligne par client, en une seule requête
+SQL_SEL_CLIENT = """SELECT c.client_id, c.gradation, c.mode,
+    w.volume, w.power, w.coeff_isolation, w.temperature_eau_froide_celsius,
+    ct.client_id AS ct_client_id, ct.temperature_minimale, ct.profil_conso_npy
+    FROM clients c
+    LEFT JOIN water_heaters w ON w.client_id = c.client_id
+    LEFT JOIN constraints ct ON ct.client_id = c.client_id
+    WHERE c.client_id = ?"""
+# 2. Tables à plusieurs lignes, en une seule requête (colonnes complétées par des NULL)
+SQL_SEL_LIGNES_CLIENT = """
+    SELECT 'consigne' AS kind, day AS a, moment AS b, temperature AS c, volume AS d
+        FROM consignes WHERE client_id = :client_id
+    UNION ALL
+    SELECT 'plage', heure_debut, heure_fin, NULL, NULL FROM plages_interdites WHERE client_id = :client_id
+    UNION ALL
+    SELECT 'prix', type, prix, NULL, NULL FROM prices WHERE client_id = :client_id
+    UNION ALL
+    SELECT 'hp', heure_debut, heure_fin, NULL, NULL FROM creneaux_hp WHERE client_id = :client_id"""
+# 3. Mêmes lectures pour un lot de clients (reconstitute_clients) : {marqueurs} = "?, ?, ..."
+SQL_SEL_CLIENTS_LOT = """SELECT c.client_id, c.gradation, c.mode,
+    w.volume, w.power, w.coeff_isolation, w.temperature_eau_froide_celsius,
+    ct.client_id AS ct_client_id, ct.temperature_minimale, ct.profil_conso_npy
+    FROM clients c
+    LEFT JOIN water_heaters w ON w.client_id = c.client_id
+    LEFT JOIN constraints ct ON ct.client_id = c.client_id
+    WHERE c.client_id IN ({marqueurs})"""
+SQL_SEL_LIGNES_CLIENTS_LOT = """
+    SELECT client_id, 'consigne' AS kind, day AS a, moment AS b, temperature AS c, volume AS d
+        FROM consignes WHERE client_id IN ({marqueurs})
+    UNION ALL
+    SELECT client_id, 'plage', heure_debut, heure_fin, NULL, NULL FROM plages_interdites WHERE client_id IN ({marqueurs})
+    UNION ALL
+    SELECT client_id, 'prix', type, prix, NULL, NULL FROM prices WHERE client_id IN ({marqueurs})
+    UNION ALL
+    SELECT client_id, 'hp', heure_debut, heure_fin, NULL, NULL FROM creneaux_hp WHERE client_id IN ({marqueurs})"""
+SQL_LIST_CLIENTS = "SELECT client_id FROM clients"
+SQL_EXISTE_CLIENT = "SELECT 1 FROM clients WHERE client_id = ?"
+# Compteur propre à chaque connexion, incrémenté quand une AUTRE connexion valide une écriture
+SQL_DATA_VERSION = "PRAGMA data_version"
+
+# Nombre maximal d'IDs par lot : SQL_SEL_LIGNES_CLIENTS_LOT lie chaque ID 4 fois (une fois par table),
+# et SQLite avant 3.32 refuse plus de 999 paramètres par requête (SQLITE_MAX_VARIABLE_NUMBER)
+TAILLE_LOT_CLIENTS = 999 // 4
+# Nombre de lignes lues à chaque fetchmany par iter_all_clients
+TAILLE_BLOC_IDS = 4096
+
+# Nombre maximal de clients gardés en cache par reconstitute_client
+TAILLE_CACHE_CLIENTS = 1024
+
+
 class ClientManager :
-    def __init__(self, path_db) :
+    def __init__(self, path_db, db : Database = None) :
         self.path_db = path_db
-        self.db = Database(path_db)
+        # Une instance Database déjà ouverte sur le même fichier peut être partagée (voir DBManager)
+        self.db = db if db is not None else Database(path_db)
+        # Cache LRU des lignes lues par reconstitute_client, indexé par client_id, partagé par les threads
+        # (protégé par _verrou_cache). Il reste valide malgré les écritures des autres managers ou processus
+        # sur le même fichier : PRAGMA data_version est relu à chaque appel et le cache est vidé dès qu'une
+        # autre connexion a écrit (voir _valider_cache). Les écritures de ce manager l'invalident après
+        # leur commit ; seules des écritures faites directement sur la connexion de ce manager, hors de ses
+        # méthodes, ne sont pas vues.
+        self._cache_clients = OrderedDict()
+        self._verrou_cache = threading.Lock()
+        # Incrémenté à chaque invalidation : une lecture commencée avant n'est pas mise en cache
+        self._generation_cache = 0
+        # Dernier (connexion, data_version) vu par chaque thread
+        self._version_vue = threading.local()
+
+    def close(self) -> None :
+        """Ferme la connexion conservée entre les appels (elle sera rouverte au besoin) et vide le cache des clients."""
+        self.db.close_db()
+        self._invalider_cache()
+
+    def __enter__(self) :
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) :
+        self.close()
 
     def create_client_in_db(self, client : Client) -> None :
         """Fonction pour ajouter les données d'un client dans la BDD. 
@@ -39,20 +163,15 @@ class ClientManager :
         - ValueError : si entrées non respectés. 
         """
 
-        # Connection avec le BDD
-        try:
-            self.db.connect_db()
-        except DatabaseConnexionError:
-            raise DatabaseConnexionError(
-                f"Impossible de se connecter à la base de données.\n"
-                f"Chemin: {self.path_db}\n"
-            )
-            
-        # print(f"Connecté à la base de données: {self.path_db}")
-        curseur = self.db.connexion.cursor()
-
-        self.db.create_all_tables()
+        # Le schéma est créé (ou migré) une seule fois, par curseur(), hors du chemin d'insertion
+        with self.db.curseur() as curseur:
+            # Toute l'insertion du client dans une seule transaction (un seul commit) ; toute erreur
+            # annule l'insertion entière (la transaction ne reste pas ouverte sur la connexion conservée)
+            with self.db.transaction_ecriture():
+                self._inserer_client(curseur, client)
 
+    def _inserer_client(self, curseur : sqlite3.Cursor, client : Client) -> None :
+        """Écrit toutes les tables d'un client, dans la transaction ouverte par create_client_in_db."""
         # Table 'clients'
         if client.features.gradation:
             if client.features.mode == OptimizationMode.AUTOCONS:
@@ -64,154 +183,47 @@ class ClientManager :
                 donnees_client = (client.client_id, 0, "AutoCons")
             else:
                 donnees_client = (client.client_id, 0, "cost")
-        try:
-            curseur.execute("""
-                INSERT INTO clients 
-                (client_id, gradation, mode) 
-                VALUES (?, ?, ?)
-            """, donnees_client)
-        except sqlite3.IntegrityError:
-            self.db.connexion.rollback() # Efacez TOUT depuis le début.
-            curseur.close()
-            self.db.close_db()
-            raise ValueError(
-                f"ID du client déjà existe.\n"
-                f"Interruption complète de l'insertion.\n"
-            )
+        self._executer(curseur, SQL_INS_CLIENT, donnees_client,
+                       f"ID du client déjà existe.\n"
+                       f"Interruption complète de l'insertion.\n")
 
         # Table 'consignes'
         if client.planning:
-            list_consignes = client.planning.setpoints
-            for consigne in list_consignes:
-                donnees_client = (client.client_id, consigne.day, consigne.time.isoformat(), 
-                                    consigne.temperature, consigne.drawn_volume) 
-                try:
-                    curseur.execute("""
-                    INSERT INTO consignes 
-                    (client_id, day, moment, temperature, volume) 
-                    VALUES (?, ?, ?, ?, ?)
-                """, donnees_client)
-                except sqlite3.IntegrityError:
-                    self.db.connexion.rollback() # Efacez TOUT depuis le début.
-                    curseur.close()
-                    self.db.close_db()
-                    raise ValueError(
-                        f"Valeur invalide envoyée dans le planning.\n"
-                        f"Interruption complète de l'insertion.\n"
-                    )
+            donnees_client = ((client.client_id, consigne.day, _to_min(consigne.time),
+                               consigne.temperature, consigne.drawn_volume)
+                              for consigne in client.planning.setpoints)
+            self._executer(curseur, SQL_INS_CONSIGNE, donnees_client, _message_invalide("le planning"))
 
         # Table 'constraints'
-        contraint_id = None # Initialisation importante
         if client.constraints:
-            # 1. On récupère la matrice numpy (le tableau de chiffres)
-            matrice_numpy = client.constraints.consumption_profile.data
-            
-            # 2. On la transforme en texte JSON pour la BDD
-            # .tolist() transforme le numpy array en liste Python standard
-            profil_json = json.dumps(matrice_numpy.tolist())
-
-            # 3. On prépare les données (Notez qu'on utilise profil_json au lieu de puissance)
-            donnees_constraints = (client.client_id, 
-                                    client.constraints.minimum_temperature, 
-                                    profil_json)
-            try:
-                # ATTENTION: J'ai changé le nom de la colonne dans la requête SQL ci-dessous
-                curseur.execute("""
-                INSERT INTO constraints 
-                (client_id, temperature_minimale, profil_conso_json) 
-                VALUES (?, ?, ?)
-            """, donnees_constraints)
-            except sqlite3.IntegrityError:
-                self.db.connexion.rollback() # Efacez TOUT depuis le début.
-                curseur.close()
-                self.db.close_db()
-                raise ValueError(
-                    f"Valeur invalide envoyée dans les contraintes.\n"
-                    f"Interruption complète de l'insertion.\n"
-                )
-                
-            # contraint_id = curseur.lastrowid
-            
-        # Table 'plages_interdites'
-            list_plages_interdites = client.constraints.forbidden_slots
-            for plage_interdite in list_plages_interdites:
-                donnees_client = (client.client_id, plage_interdite.start, plage_interdite.end)
-                try:
-                    curseur.execute("""
-                    INSERT INTO plages_interdites
-                    (client_id, heure_debut, heure_fin)
-                    VALUES (?, ?, ?)
-                """, donnees_client)
-                except sqlite3.IntegrityError:
-                    self.db.connexion.rollback() # Efacez TOUT depuis le début.
-                    curseur.close()
-                    self.db.close_db()
-                    raise ValueError(
-                        f"Valeur invalide envoyée dans les plages interdites.\n"
-                        f"Interruption complète de l'insertion.\n"
-                    )
-            
+            # La matrice numpy est liée telle quelle : l'adaptateur sqlite3 la sérialise en NPY (voir base_db)
+            donnees_constraints = (client.client_id,
+                                   client.constraints.minimum_temperature,
+                                   client.constraints.consumption_profile.data)
+            self._executer(curseur, SQL_INS_CONSTRAINT, donnees_constraints, _message_invalide("les contraintes"))
+
+            # Table 'plages_interdites'
+            donnees_client = ((client.client_id, _to_min(plage_interdite.start), _to_min(plage_interdite.end))
+                              for plage_interdite in client.constraints.forbidden_slots)
+            self._executer(curseur, SQL_INS_PLAGE, donnees_client, _message_invalide("les plages interdites"))
+
         # Table 'prices'
         if client.prices:
             if client.prices.mode == 'BASE':
                 donnees_client = [(client.client_id, 'base', client.prices.base),
-                                    (client.client_id, 'revente', client.prices.resale_price)]
-                try:
-                    curseur.executemany("""
-                        INSERT INTO prices 
-                        (client_id, type, prix) 
-                        VALUES (?, ?, ?)
-                    """, donnees_client)
-                except sqlite3.IntegrityError:
-                    self.db.connexion.rollback() # Efacez TOUT depuis le début.
-                    curseur.close()
-                    self.db.close_db()
-                    raise ValueError(
-                        f"Valeur invalide envoyée dans les prix.\n"
-                        f"Interruption complète de l'insertion.\n"
-                    )
+                                  (client.client_id, 'revente', client.prices.resale_price)]
+                self._executer(curseur, SQL_INS_PRICE, donnees_client, _message_invalide("les prix"))
             elif client.prices.mode == 'HPHC':
                 donnees_client = [(client.client_id, 'hp', client.prices.hp),
-                                    (client.client_id, 'hc', client.prices.hc),
-                                    (client.client_id, 'revente', client.prices.resale_price)]
-                try:
-                    curseur.executemany("""
-                        INSERT INTO prices 
-                        (client_id, type, prix) 
-                        VALUES (?, ?, ?)
-                    """, donnees_client)
-
-        # Table 'creneaux_hp'
-                    list_creneaux_hp = client.prices.hp_slots
-                    for creneau_hp in list_creneaux_hp:
-                        donnees_client = (client.client_id, creneau_hp.start.isoformat(), creneau_hp.end.isoformat())
-                        try:
-                            curseur.execute("""
-                                INSERT INTO creneaux_hp  
-                                (client_id, heure_debut, heure_fin) 
-                                VALUES (?, ?, ?)
-                            """, donnees_client)
-                        except sqlite3.IntegrityError:
-                            self.db.connexion.rollback() # Efacez TOUT depuis le début.
-                            curseur.close()
-                            self.db.close_db()
-                            raise ValueError(
-                                f"Valeur invalide envoyée dans les creneaux_hp.\n"
-                                f"Interruption complète de l'insertion.\n"
-                            )
-
-                except sqlite3.IntegrityError:
-                    self.db.connexion.rollback() # Efacez TOUT depuis le début.
-                    curseur.close()
-                    self.db.close_db()
-                    raise ValueError(
-                        f"Valeur invalide envoyée dans les prix.\n"
-                        f"Interruption complète de l'insertion.\n"
-                    )
+                                  (client.client_id, 'hc', client.prices.hc),
+                                  (client.client_id, 'revente', client.prices.resale_price)]
+                self._executer(curseur, SQL_INS_PRICE, donnees_client, _message_invalide("les prix"))
+
+                # Table 'creneaux_hp'
+                donnees_client = ((client.client_id, _to_min(creneau_hp.start), _to_min(creneau_hp.end))
+                                  for creneau_hp in client.prices.hp_slots)
+                self._executer(curseur, SQL_INS_HP, donnees_client, _message_invalide("les creneaux_hp"))
             else:
-                self.db.connexion.rollback() # Efacez TOUT depuis le début.
-                curseur.close()
-                self.db.close_db()
                 raise ValueError(
                     f"Mode invalide dans les prix.\n"
                     f"Interruption complète de l'insertion.\n"
@@ -219,28 +231,31 @@ class ClientManager :
 
         # Table 'water_heaters'
         if client.water_heater:
-            donnees_client = (client.client_id, client.water_heater.volume, 
-                            client.water_heater.power, client.water_heater.insulation_coefficient, 
-                            client.water_heater.cold_water_temperature)
-            try:
-                curseur.execute("""
-                    INSERT INTO water_heaters
-                    (client_id, volume, power, coeff_isolation, temperature_eau_froide_celsius) 
-                    VALUES (?, ?, ?, ?, ?)
-                """, donnees_client)
-            except sqlite3.IntegrityError:
-                self.db.connexion.rollback() # Efacez TOUT depuis le début.
-                curseur.close()
-                self.db.close_db()
-                raise ValueError(
-                    f"Valeur invalide envoyée dans les water_heaters.\n"
-                    f"Interruption complète de l'insertion.\n"
-                )
+            donnees_client = (client.client_id, client.water_heater.volume,
+                              client.water_heater.power, client.water_heater.insulation_coefficient,
+                              client.water_heater.cold_water_temperature)
+            self._executer(curseur, SQL_INS_WH, donnees_client, _message_invalide("les water_heaters"))
+
+    def _executer(self, curseur : sqlite3.Cursor, sql : str, donnees, message : str) -> sqlite3.Cursor :
+        """Exécute une requête d'écriture : execute pour une ligne (tuple), executemany sinon.
+        Args :
+        - curseur : sqlite3.Cursor (curseur de la transaction en cours)
+        - sql : str (requête, voir les constantes SQL_*)
+        - donnees : tuple (une ligne) ou itérable de tuples (plusieurs lignes)
+        - message : str (message de l'erreur levée si une contrainte de la BDD est violée)
+        Returns :
+        - curseur : sqlite3.Cursor (pour lire rowcount)
+        Raises :
+        - ValueError : si une contrainte de la BDD est violée (transaction_ecriture annule alors TOUT
+          depuis le début de la transaction).
+        """
+        try:
+            if isinstance(donnees, tuple):
+                return curseur.execute(sql, donnees)
+            return curseur.executemany(sql, donnees)
+        except sqlite3.IntegrityError:
+            raise ValueError(message)
 
-        self.db.connexion.commit() # Sauvegarder en disque
-        curseur.close()
-        self.db.close_db()
-        
     def reconstitute_client(self, client_id : int = 0) -> Client :
         """Fonction pour reconstituer un client à partir de son ID. 
         Args : 
@@ -258,151 +273,172 @@ class ClientManager :
         if not isinstance(client_id, int):
             raise ValueError("L'ID du client doit être un doit être un nombre entier.")
 
-        # Connection avec le BDD
-        try:
-            self.db.connect_db()        
-        except DatabaseConnexionError:
-            raise DatabaseConnexionError(
-                f"Impossible de se connecter à la base de données.\n"
-                f"Chemin: {self.path_db}\n"
-            )         
-
-        # print(f"Connecté à la base de données: {self.path_db}")
-            
-        # Configurer pour retourner des dictionnaires
-        self.db.connexion.row_factory = sqlite3.Row
-        
-        # Créer un curseur pour exécuter les requêtes
-        curseur = self.db.connexion.cursor()
-        
-        ########################################################################
-        #  Exécuter la requête SQL pour trouver les donnees de la table 'clients'
-        ########################################################################
-        curseur.execute("SELECT client_id, gradation, mode FROM clients WHERE client_id=?", (client_id,))
-        
-        # Récupérer tous les résultats
-        enregistrements = curseur.fetchall()
-        
-        if not enregistrements:
-            curseur.close()
-            self.db.close_db()
-            raise ClientNotFound(f"Aucun client avec l'ID {client_id}\n")
-        
-        # Convertir en liste de dictionnaires
-        resultats = []
-        for ligne in enregistrements:
-            resultats.append(dict(ligne))  # Convertit Row en dictionnaire
-        donnes_client = resultats[0]
-
-        ####################################################################################################
-        #  Exécuter la requête SQL pour trouver les donnees de la table 'constraints' et 'plages_interdites'
-        ####################################################################################################
-        
-        curseur.execute(
-            """SELECT ct.temperature_minimale, ct.profil_conso_json, pi.heure_debut, pi.heure_fin
-            FROM constraints ct LEFT JOIN plages_interdites pi ON pi.client_id = ct.client_id
-            WHERE ct.client_id=?""", (client_id,)
-            )
-       
-        # Récupérer tous les résultats
-        enregistrements = curseur.fetchall()
-        
-        if not enregistrements:
-            list_donnes_constraints = None
-        else:
-            # Convertir en liste de dictionnaires
-            resultats = []
-            for ligne in enregistrements:
-                resultats.append(dict(ligne))  # Convertit Row en dictionnaire
-            list_donnes_constraints = copy.deepcopy(resultats)
-
-        ###############################################################################
-        #  Exécuter la requête SQL pour trouver les donnees de la table 'water_heaters'
-        ###############################################################################
-        curseur.execute("""SELECT volume, power, coeff_isolation, temperature_eau_froide_celsius
-                        FROM water_heaters
-                        WHERE client_id=?""", (client_id,))
-        
-        # Récupérer tous les résultats
-        enregistrements = curseur.fetchall()
-        
-        if not enregistrements:
-            donnes_water_heaters = None
-        else:
-            # Convertir en liste de dictionnaires
-            resultats = []
-            for ligne in enregistrements:
-                resultats.append(dict(ligne))  # Convertit Row en dictionnaire
-            donnes_water_heaters = resultats[0]
-
-        ###########################################################################
-        #  Exécuter la requête SQL pour trouver les donnees de la table 'consignes'
-        ###########################################################################
-        curseur.execute("""SELECT day, moment, temperature, volume
-                        FROM consignes
-                        WHERE client_id=?""", (client_id,))
-        
-        # Récupérer tous les résultats
-        enregistrements = curseur.fetchall()
-        
-        if not enregistrements:
-            list_donnes_consignes = None
-        else:
-            # Convertir en liste de dictionnaires
-            resultats = []
-            for ligne in enregistrements:
-                resultats.append(dict(ligne))  # Convertit Row en dictionnaire
-            list_donnes_consignes = copy.deepcopy(resultats)
-
-        ########################################################################
-        #  Exécuter la requête SQL pour trouver les donnees de la table 'prices'
-        ########################################################################
-        curseur.execute(
-            """SELECT type, prix
-            FROM prices
-            WHERE client_id=?""", (client_id,)
-            )
-        
-        # Récupérer tous les résultats
-        enregistrements = curseur.fetchall()
-        
-        if not enregistrements:
-            list_donnes_prices = None
-        else:
-            # Convertir en liste de dictionnaires
-            resultats = []
-            for ligne in enregistrements:
-                resultats.append(dict(ligne))  # Convertit Row en dictionnaire
-            list_donnes_prices = copy.deepcopy(resultats)
-
-        #############################################################################
-        #  Exécuter la requête SQL pour trouver les donnees de la table 'creneaux_hp'
-        #############################################################################
-        curseur.execute(
-            """SELECT heure_debut, heure_fin
-            FROM creneaux_hp
-            WHERE client_id=?""", (client_id,)
-            )
-        
-        # Récupérer tous les résultats
-        enregistrements = curseur.fetchall()
-        
-        if not enregistrements:
-            list_donnes_creneaux_hp = None
-        else:
-            # Convertir en liste de dictionnaires
-            resultats = []
-            for ligne in enregistrements:
-                # 1. Converte a string do banco (ex: "08:00:00") em objeto datetime.time
-                h_debut = time.fromisoformat(ligne['heure_debut'])
-                h_fin = time.fromisoformat(ligne['heure_fin'])
-                
-                # 2. Instancia o objeto TimeSlot do seu domínio
-                slot = TimeSlot(start=h_debut, end=h_fin)
-                
-                # 3. Adiciona à lista
-                resultats.append(slot)
-            list_donnes_creneaux_hp = copy.deepcopy(resultats)
+        # Les lignes lues en BDD sont gardées en cache : un second appel ne fait que lire data_version.
+        # Le cache ne contient que des lignes (immuables) : chaque appel renvoie un nouvel objet Client,
+        # que l'appelant peut modifier sans altérer le cache.
+        self._valider_cache()
+        with self._verrou_cache:
+            donnees = self._cache_clients.get(client_id)
+            if donnees is not None:
+                self._cache_clients.move_to_end(client_id)
+            generation = self._generation_cache
+        if donnees is None:
+            donnees = self._lire_donnees_client(client_id)
+            self._mettre_en_cache({client_id: donnees}, generation)
+
+        return self._assemble_client(*donnees)
+
+    def reconstitute_clients(self, clients_id : list) -> list :
+        """Fonction pour reconstituer plusieurs clients à partir de leurs IDs.
+        Les clients absents du cache sont lus en deux requêtes par lot (WHERE client_id IN (...)),
+        au lieu de deux requêtes par client.
+        Args :
+        - clients_id : liste d'int (les IDs des clients dans la BDD)
+        Returns :
+        - clients : liste d'objets de type Client, dans l'ordre de clients_id
+        Raises :
+        - DatabaseConnexionError : Si accès impossible à la base de données
+        - ClientNotFound : Si au moins un des IDs ne correspond à aucun client
+        - ValueError : Si l'entrée n'est pas conforme.
+        """
+        # Test de type des IDs des clients
+        if not all(isinstance(client_id, int) for client_id in clients_id):
+            raise ValueError("Les IDs des clients doivent être des nombres entiers.")
+
+        # Lignes des clients déjà en cache, puis lecture par lots des autres
+        self._valider_cache()
+        with self._verrou_cache:
+            donnees_par_id = {client_id: self._cache_clients[client_id]
+                              for client_id in clients_id if client_id in self._cache_clients}
+            generation = self._generation_cache
+        a_lire = [client_id for client_id in dict.fromkeys(clients_id) if client_id not in donnees_par_id]
+        for debut in range(0, len(a_lire), TAILLE_LOT_CLIENTS):
+            donnees_par_id.update(self._lire_donnees_clients(a_lire[debut:debut + TAILLE_LOT_CLIENTS]))
+
+        absents = [client_id for client_id in a_lire if client_id not in donnees_par_id]
+        if absents:
+            raise ClientNotFound(f"Aucun client avec les IDs {absents}\n")
+
+        self._mettre_en_cache(donnees_par_id, generation)
+        return [self._assemble_client(*donnees_par_id[client_id]) for client_id in clients_id]
+
+    def _mettre_en_cache(self, donnees_par_id : dict, generation : int) -> None :
+        """Ajoute les lignes de clients au cache LRU, en retirant les clients les moins récemment utilisés si besoin.
+        Rien n'est ajouté si le cache a été invalidé depuis generation (lignes lues avant une écriture)."""
+        with self._verrou_cache:
+            if generation != self._generation_cache:
+                return
+            for client_id, donnees in donnees_par_id.items():
+                self._cache_clients[client_id] = donnees
+                self._cache_clients.move_to_end(client_id)
+            while len(self._cache_clients) > TAILLE_CACHE_CLIENTS:
+                self._cache_clients.popitem(last=False)
+
+    def _invalider_cache(self, client_id : int = None) -> None :
+        """Retire un client du cache (tout le cache si client_id est None)."""
+        with self._verrou_cache:
+            self._generation_cache += 1
+            if client_id is None:
+                self._cache_clients.clear()
+            else:
+                self._cache_clients.pop(client_id, None)
+
+    def _valider_cache(self) -> None :
+        """Vide le cache si une autre connexion a écrit dans la BDD depuis le dernier appel de ce thread
+        (PRAGMA data_version ne change pas pour les écritures de la connexion elle-même).
+        Une connexion pas encore vue par ce thread ne dit rien des écritures passées : le cache est vidé."""
+        with self.db.curseur() as curseur:
+            vue = (self.db.connexion, curseur.execute(SQL_DATA_VERSION).fetchone()[0])
+        if getattr(self._version_vue, 'valeur', None) != vue:
+            self._version_vue.valeur = vue
+            self._invalider_cache()
+
+    def _lire_donnees_client(self, client_id : int) -> tuple :
+        """Lit en BDD toutes les lignes d'un client (sans construire d'objet).
+        Args :
+        - client_id : int (un entier unique représentant le client dans la BDD)
+        Returns :
+        - (ligne_client, lignes) : la ligne de SQL_SEL_CLIENT et le tuple des lignes de SQL_SEL_LIGNES_CLIENT
+        Raises :
+        - DatabaseConnexionError : Si accès impossible à la base de données
+        - ClientNotFound : Si aucun client n'a l'ID client_id
+        """
+
+        # Lignes en sqlite3.Row (indexables par nom de colonne) ;
+        # les deux requêtes lisent le même instantané de la BDD
+        with self.db.curseur(lignes_nommees=True) as curseur, self.db.transaction_lecture():
+            ####################################################################################################
+            #  Requête 1 : données à une ligne par client ('clients', 'water_heaters', 'constraints')
+            ####################################################################################################
+            curseur.execute(SQL_SEL_CLIENT, (client_id,))
+            ligne_client = curseur.fetchone()
+
+            if ligne_client is None:
+                raise ClientNotFound(f"Aucun client avec l'ID {client_id}\n")
+
+            ####################################################################################################
+            #  Requête 2 : tables à plusieurs lignes ('consignes', 'plages_interdites', 'prices', 'creneaux_hp')
+            #  réunies par UNION ALL, la colonne 'kind' indique la table d'origine
+            ####################################################################################################
+            curseur.execute(SQL_SEL_LIGNES_CLIENT, {"client_id": client_id})
+            lignes = tuple(curseur)
+
+        return ligne_client, lignes
+
+    def _lire_donnees_clients(self, clients_id : list) -> dict :
+        """Lit en BDD les lignes d'un lot de clients (deux requêtes pour tout le lot).
+        Args :
+        - clients_id : liste d'int (IDs distincts, au plus TAILLE_LOT_CLIENTS)
+        Returns :
+        - dict {client_id : (ligne_client, lignes)}, au même format que _lire_donnees_client ;
+          les IDs sans client en BDD sont absents du dictionnaire.
+        Raises :
+        - DatabaseConnexionError : Si accès impossible à la base de données
+        """
+        marqueurs = ", ".join("?" * len(clients_id))
+
+        # Les deux requêtes lisent le même instantané de la BDD
+        with self.db.curseur(lignes_nommees=True) as curseur, self.db.transaction_lecture():
+            # Requête 1 : une ligne par client
+            curseur.execute(SQL_SEL_CLIENTS_LOT.format(marqueurs=marqueurs), clients_id)
+            lignes_clients = {ligne['client_id']: ligne for ligne in curseur}
+
+            # Requête 2 : lignes des tables à plusieurs lignes, regroupées par client_id
+            lignes_par_client = defaultdict(list)
+            curseur.execute(SQL_SEL_LIGNES_CLIENTS_LOT.format(marqueurs=marqueurs), clients_id * 4)
+            for client_id, *ligne in curseur:
+                lignes_par_client[client_id].append(tuple(ligne))
+
+        return {client_id: (ligne_client, tuple(lignes_par_client[client_id]))
+                for client_id, ligne_client in lignes_clients.items()}
+
+    def _assemble_client(self, ligne_client : sqlite3.Row, lignes : tuple) -> Client :
+        """Construit l'objet Client à partir des lignes lues par _lire_donnees_client.
+        Args :
+        - ligne_client : sqlite3.Row (clients, water_heaters et constraints)
+        - lignes : tuple des lignes (kind, a, b, c, d) des tables à plusieurs lignes
+        Returns :
+        - client : Objet de type Client reconstitué (voir models)
+        """
+        # sqlite3.Row s'indexe déjà par nom de colonne : pas de conversion en dictionnaire
+        donnes_client = ligne_client
+        # Les LEFT JOIN renvoient des NULL si le client n'a pas de ballon ou de contraintes
+        donnes_water_heaters = donnes_client if donnes_client['volume'] is not None else None
+        info_constraint = donnes_client if donnes_client['ct_client_id'] is not None else None
+
+        # Un seul passage sur les lignes : chaque ligne devient directement un objet du domaine
+        list_setpoints, list_creneaux, list_creneaux_hp = [], [], []
+        prix_par_type = {}
+        for kind, a, b, c, d in lignes:
+            if kind == 'consigne':
+                list_setpoints.append(Setpoint(a, _from_min(b), c, d))
+            elif kind == 'prix':
+                prix_par_type[a] = b
+            elif kind == 'plage':
+                # Conversion minutes depuis minuit -> time
+                list_creneaux.append(TimeSlot(_from_min(a), _from_min(b)))
+            else:
+                list_creneaux_hp.append(TimeSlot(_from_min(a), _from_min(b)))
 
         ##################
         #  Reconstruction
@@ -410,46 +446,22 @@ class ClientManager :
 
         # Partie Planning
         planning_reconstruit = Planning()
-        if list_donnes_consignes:
-            list_setpoints = []
-            for consigne in list_donnes_consignes:
-                list_setpoints.append(Setpoint(consigne['day'], time.fromisoformat(consigne['moment']),
-                                                consigne['temperature'], consigne['volume']))
+        if list_setpoints:
             planning_reconstruit.setpoints = list_setpoints
 
         #NOUVELLE PARTIE CONTRAINTES ###############################################################################
         #---------------------------------------------------------------------------------------------------------######
-        # Partie Constraints (VERSION CORRIGÉE JSON)
+        # Partie Constraints (profil stocké au format NPY)
         # Note: Assurez-vous d'avoir "from client_models import ProfilConsommation" en haut
         
         constraints_reconstruit = None
         
-        if list_donnes_constraints:
-            # 1. Gestion des Plages Interdites
-            list_creneaux = []
-            for constraint in list_donnes_constraints:
-                # Vérification de sécurité si les champs sont non-nuls
-                if constraint['heure_debut'] and constraint['heure_fin']:
-                    # Conversion robuste str -> time
-                    h_debut = constraint['heure_debut']
-                    if isinstance(h_debut, str): 
-                        h_debut = datetime.strptime(h_debut, '%H:%M:%S').time()
-                        
-                    h_fin = constraint['heure_fin']
-                    if isinstance(h_fin, str): 
-                        h_fin = datetime.strptime(h_fin, '%H:%M:%S').time()
-                        
-                    list_creneaux.append(TimeSlot(h_debut, h_fin))
-            
-            info_constraint = list_donnes_constraints[0]
-            
-            # 2. Gestion du Profil de Consommation (Lecture du JSON)
-            json_text = info_constraint['profil_conso_json']
+        if info_constraint:
+            # 1. Les Plages Interdites sont déjà dans list_creneaux
+            # 2. Gestion du Profil de Consommation (colonne NPARRAY : déjà relue en np.ndarray)
+            matrice_numpy = info_constraint['profil_conso_npy']
             
-            if json_text:
-                # On transforme le texte JSON de la BDD en objet ProfilConsommation
-                data_list = json.loads(json_text)
-                matrice_numpy = np.array(data_list)
+            if matrice_numpy is not None:
                 profil_objet = ConsumptionProfile(matrix_7x24=matrice_numpy)
             else:
                 profil_objet = ConsumptionProfile() # Profil par défaut si vide
@@ -465,42 +477,32 @@ class ClientManager :
             # Si le client n'a aucune contrainte en BDD
             constraints_reconstruit = Constraints()
 
-        # Partie Features
-        if donnes_client['gradation'] == 1:
-            if donnes_client['mode'] == 'AutoCons':
-                features_reconstruit = Features(True, OptimizationMode.AUTOCONS)
-            else:
-                features_reconstruit = Features(True, OptimizationMode.COST)
-        else:
-            if donnes_client['mode'] == 'AutoCons':
-                features_reconstruit = Features(False, OptimizationMode.AUTOCONS)
-            else:
-                features_reconstruit = Features(False, OptimizationMode.COST)
-                
+        # Partie Features (gradation stockée en 0/1, mode stocké par la valeur de l'enum)
+        features_reconstruit = Features(bool(donnes_client['gradation']), OptimizationMode(donnes_client['mode']))
+
         # Partie Prices
         prix_reconstruit = Prices()
-        if list_donnes_prices:
-            for price in list_donnes_prices:
-                if price['type'] == 'base':
-                    prix_reconstruit.base = price['prix']
-                elif price['type'] == 'revente':
-                    prix_reconstruit.resale_price = price['prix']
-            prix_reconstruit.mode = 'HPHC'
-            for price in list_donnes_prices:
-                if price['type'] == 'hp':
-                    prix_reconstruit.hp = price['prix']
-                elif price['type'] == 'hc':
-                    prix_reconstruit.hc = price['prix']
-            # list_creneaux_hp = []
-            # for creneau_hp in list_donnes_creneaux_hp:
-            #     list_creneaux_hp.append(TimeSlot(creneau_hp['heure_debut'], creneau_hp['heure_fin']))
-            prix_reconstruit.hp_slots = list_donnes_creneaux_hp
-
-        # Partie WaterHeater
-        water_heater_reconstruit = WaterHeater(donnes_water_heaters['volume'],
-                                                donnes_water_heaters['power'])
-        water_heater_reconstruit.insulation_coefficient = donnes_water_heaters['coeff_isolation']
-        water_heater_reconstruit.cold_water_temperature = donnes_water_heaters['temperature_eau_froide_celsius']
+        if prix_par_type:
+            # Le mode se déduit des types de prix enregistrés (hp/hc => HPHC, base => BASE)
+            prix_reconstruit.mode = 'HPHC' if 'hp' in prix_par_type else 'BASE'
+            if 'revente' in prix_par_type:
+                prix_reconstruit.resale_price = prix_par_type['revente']
+            if prix_reconstruit.mode == 'HPHC':
+                prix_reconstruit.hp = prix_par_type['hp']
+                if 'hc' in prix_par_type:
+                    prix_reconstruit.hc = prix_par_type['hc']
+                if list_creneaux_hp:
+                    prix_reconstruit.hp_slots = list_creneaux_hp
+            elif 'base' in prix_par_type:
+                prix_reconstruit.base = prix_par_type['base']
+
+        # Partie WaterHeater (absente si le client a été enregistré sans ballon)
+        water_heater_reconstruit = None
+        if donnes_water_heaters is not None:
+            water_heater_reconstruit = WaterHeater(donnes_water_heaters['volume'],
+                                                    donnes_water_heaters['power'])
+            water_heater_reconstruit.insulation_coefficient = donnes_water_heaters['coeff_isolation']
+            water_heater_reconstruit.cold_water_temperature = donnes_water_heaters['temperature_eau_froide_celsius']
 
             
         client_reconstruit = Client(
@@ -512,8 +514,6 @@ class ClientManager :
             client_id=donnes_client['client_id']
         )
 
-        curseur.close()
-        self.db.close_db()
         return client_reconstruit
     
     def delete_client(self, client_id : int) -> None :
@@ -531,31 +531,11 @@ class ClientManager :
         if not isinstance(client_id, int):
             raise ValueError("L'ID du client doit être un doit être un nombre entier.")
 
-        # Connection avec le BDD
-        try:
-            self.db.connect_db()        
-        except DatabaseConnexionError:
-            raise DatabaseConnexionError(
-                f"Impossible de se connecter à la base de données.\n"
-                f"Chemin: {self.path_db}\n"
-            )         
-
-        # print(f"Connecté à la base de données: {self.path_db}")
-            
-        # Configurer pour retourner des dictionnaires
-        self.db.connexion.row_factory = sqlite3.Row
-        
-        # Créer un curseur pour exécuter le requête
-        curseur = self.db.connexion.cursor()
-
-        curseur.execute("DELETE FROM clients WHERE client_id = ?", (client_id,))
-        
-        # Récupérer tous les résultats
-        lignes_concernees = curseur.rowcount
-
-        self.db.connexion.commit() # Sauvegarder en disque
-        curseur.close()
-        self.db.close_db()
+        with self.db.curseur() as curseur, self.db.transaction_ecriture():
+            curseur.execute(SQL_DEL_CLIENT, (client_id,))
+            lignes_concernees = curseur.rowcount
+        # Après le commit : une lecture concurrente de l'ancien état ne peut plus être remise en cache
+        self._invalider_cache(client_id)
         
         if not lignes_concernees:
             raise ClientNotFound(f"Aucun client avec l'ID {client_id}\n")
@@ -588,227 +568,98 @@ class ClientManager :
         if not isinstance(client_id, int):
             raise ValueError("L'ID du client doit être un doit être un nombre entier.")
 
-        # Connection avec le BDD
-        try:
-            self.db.connect_db()        
-        except DatabaseConnexionError:
-            raise DatabaseConnexionError(
-                f"Impossible de se connecter à la base de données.\n"
-                f"Chemin: {self.path_db}\n"
-            )         
-
-        # print(f"Connecté à la base de données: {self.path_db}")
-            
-        # Configurer pour retourner des dictionnaires
-        self.db.connexion.row_factory = sqlite3.Row
-        
-        # Créer un curseur pour exécuter le requête
-        curseur = self.db.connexion.cursor()
+        # Toute la mise à jour dans une seule transaction (un seul commit, annulée entièrement en cas
+        # d'erreur), verrou d'écriture pris dès le début : le test d'existence et les écritures voient
+        # le même état de la BDD
+        with self.db.curseur() as curseur, self.db.transaction_ecriture():
+            # Le client doit exister (recherche par clé primaire) : sans ce test, l'upsert de 'clients'
+            # créerait un nouveau client et les autres tables échoueraient sur la clé étrangère
+            if curseur.execute(SQL_EXISTE_CLIENT, (client_id,)).fetchone() is None:
+                raise ClientNotFound(f"Aucun client avec l'ID {client_id}\n")
 
-        # Table 'clients'
-        if features:
-            if features.gradation:
-                if features.mode == OptimizationMode.AUTOCONS:
-                    donnees_client = (client_id, 1, "AutoCons")
+            # Table 'clients'
+            if features:
+                if features.gradation:
+                    if features.mode == OptimizationMode.AUTOCONS:
+                        donnees_client = (client_id, 1, "AutoCons")
+                    else:
+                        donnees_client = (client_id, 1, "cost")
                 else:
-                    donnees_client = (client_id, 1, "cost")
-            else:
-                if features.mode == OptimizationMode.AUTOCONS:
-                    donnees_client = (client_id, 0, "AutoCons")
+                    if features.mode == OptimizationMode.AUTOCONS:
+                        donnees_client = (client_id, 0, "AutoCons")
+                    else:
+                        donnees_client = (client_id, 0, "cost")
+                self._executer(curseur, SQL_UPSERT_CLIENT, donnees_client,
+                               f"Valeurs invalides pour la gradation ou le mode.\n"
+                               f"Interruption complète du changement.\n")
+
+            # Table 'consignes'
+            if planning:
+                curseur.execute(SQL_DEL_CONSIGNES, (client_id,))
+                # Toutes les consignes en un seul executemany (l'upsert garde la dernière consigne
+                # en cas de doublon (day, moment) dans le planning)
+                donnees_client = ((client_id, consigne.day, _to_min(consigne.time),
+                                   consigne.temperature, consigne.drawn_volume)
+                                  for consigne in planning.setpoints)
+                self._executer(curseur, SQL_UPSERT_CONSIGNE, donnees_client,
+                               _message_invalide("le planning", "du changement"))
+
+            # Table 'constraints'
+            if constraints:
+                # La matrice numpy est liée telle quelle : l'adaptateur sqlite3 la sérialise en NPY (voir base_db)
+                donnees_constraints = (client_id,
+                                       constraints.minimum_temperature,
+                                       constraints.consumption_profile.data)
+                self._executer(curseur, SQL_UPSERT_CONSTRAINT, donnees_constraints,
+                               _message_invalide("les contraintes", "du changement"))
+
+                # Table 'plages_interdites'
+                curseur.execute(SQL_DEL_PLAGES, (client_id,))
+                donnees_client = ((client_id, _to_min(plage_interdite.start), _to_min(plage_interdite.end))
+                                  for plage_interdite in constraints.forbidden_slots)
+                self._executer(curseur, SQL_INS_PLAGE, donnees_client,
+                               _message_invalide("les plages interdites", "du changement"))
+
+            # Table 'prices'
+            if prices:
+                # Le mode est déduit des lignes présentes à la lecture (voir _assemble_client) : les prix
+                # et les créneaux HP de l'ancien mode sont supprimés avant d'écrire ceux du nouveau
+                curseur.execute(SQL_DEL_PRICES, (client_id,))
+                curseur.execute(SQL_DEL_HP, (client_id,))
+                if prices.mode == 'BASE':
+                    donnees_client = [(client_id, 'base', prices.base),
+                                      (client_id, 'revente', prices.resale_price)]
+                    self._executer(curseur, SQL_INS_PRICE, donnees_client,
+                                   _message_invalide("les prix", "du changement"))
+                elif prices.mode == 'HPHC':
+                    donnees_client = [(client_id, 'hp', prices.hp),
+                                      (client_id, 'hc', prices.hc),
+                                      (client_id, 'revente', prices.resale_price)]
+                    self._executer(curseur, SQL_INS_PRICE, donnees_client,
+                                   _message_invalide("les prix", "du changement"))
+
+                    # Table 'creneaux_hp' : tous les créneaux en un seul executemany (une ligne par créneau)
+                    hp_rows = ((client_id, _to_min(creneau_hp.start), _to_min(creneau_hp.end))
+                               for creneau_hp in prices.hp_slots)
+                    self._executer(curseur, SQL_INS_HP, hp_rows,
+                                   _message_invalide("les prix", "du changement"))
                 else:
-                    donnees_client = (client_id, 0, "cost")
-            try:
-                curseur.execute("""
-                    INSERT INTO clients 
-                    (client_id, gradation, mode) 
-                    VALUES (?, ?, ?) ON CONFLICT(client_id) DO UPDATE SET
-                    gradation = excluded.gradation,
-                    mode = excluded.mode
-                """, donnees_client)
-            except sqlite3.IntegrityError:
-                curseur.close()
-                self.db.close_db()
-                raise ValueError(
-                    f"Valeurs invalides pour la gradation ou le mode.\n"
-                    f"Interruption complète du changement.\n"
-                )
-            
-            # Récupérer tous les résultats
-            lignes_concernees = curseur.rowcount
-            
-            if not lignes_concernees:
-                curseur.close()
-                self.db.close_db()
-                raise ClientNotFound(f"Aucun client avec l'ID {client_id}\n")
-
-        # Table 'consignes'
-        if planning:
-            curseur.execute("DELETE FROM consignes WHERE client_id = ?", (client_id,))
-            list_consignes = planning.setpoints
-            for consigne in list_consignes:
-                donnees_client = (client_id, consigne.day, consigne.time.isoformat(), 
-                                    consigne.temperature, consigne.drawn_volume) 
-                try:
-                    curseur.execute("""
-                    INSERT INTO consignes 
-                    (client_id, day, moment, temperature, volume) 
-                    VALUES (?, ?, ?, ?, ?)
-                    ON CONFLICT(client_id, day, moment) DO UPDATE SET
-                        temperature = excluded.temperature,
-                        volume = excluded.volume
-                """, donnees_client)
-                except sqlite3.IntegrityError:
-                    curseur.close()
-                    self.db.close_db()
                     raise ValueError(
-                        f"Valeur invalide envoyée dans le planning.\n"
+                        f"Mode invalide dans les prix.\n"
                         f"Interruption complète du changement.\n"
                     )
 
-        # Table 'constraints'
-        # contraint_id = None # Initialisation importante
-        if constraints:
-            # 1. On récupère la matrice numpy (le tableau de chiffres)
-            matrice_numpy = constraints.consumption_profile.data
-            
-            # 2. On la transforme en texte JSON pour la BDD
-            # .tolist() transforme le numpy array en liste Python standard
-            profil_json = json.dumps(matrice_numpy.tolist())
-
-            # 3. On prépare les données (Notez qu'on utilise profil_json au lieu de puissance)
-            donnees_constraints = (client_id,
-                                   constraints.minimum_temperature, 
-                                    profil_json)
-            try:
-                # ATTENTION: J'ai changé le nom de la colonne dans la requête SQL ci-dessous
-                curseur.execute("""
-                INSERT INTO constraints 
-                (client_id, temperature_minimale, profil_conso_json)
-                VALUES (?, ?, ?)
-                ON CONFLICT(client_id) DO UPDATE SET
-                    temperature_minimale = excluded.temperature_minimale,
-                    profil_conso_json = excluded.profil_conso_json
-            """, donnees_constraints)
-            except sqlite3.IntegrityError:
-                curseur.close()
-                self.db.close_db()
-                raise ValueError(
-                    f"Valeur invalide envoyée dans les contraintes.\n"
-                    f"Interruption complète du changement.\n"
-                )
-                
-            # contraint_id = curseur.lastrowid
-            
-        # Table 'plages_interdites'
-            curseur.execute("DELETE FROM plages_interdites WHERE client_id = ?", (client_id,))
-            list_plages_interdites = constraints.forbidden_slots
-            for plage_interdite in list_plages_interdites:
-                donnees_client = (client_id, plage_interdite.start, plage_interdite.end)
-                try:
-                    curseur.execute("""
-                    INSERT INTO plages_interdites
-                    (client_id, heure_debut, heure_fin)
-                    VALUES (?, ?, ?)
-                """, donnees_client)
-                except sqlite3.IntegrityError:
-                    curseur.close()
-                    self.db.close_db()
-                    raise ValueError(
-                        f"Valeur invalide envoyée dans les plages interdites.\n"
-                        f"Interruption complète du changement.\n"
-                    )
-            
-        # Table 'prices'
-        if prices:
-            if prices.mode == 'BASE':
-                donnees_client = [(client_id, 'base', prices.base),
-                                    (client_id, 'revente', prices.resale_price)]
-                try:
-                    curseur.executemany("""
-                        INSERT INTO prices 
-                        (client_id, type, prix) 
-                        VALUES (?, ?, ?) ON CONFLICT(client_id, type) DO UPDATE SET
-                        prix = excluded.prix
-                    """, donnees_client)
-                except sqlite3.IntegrityError:
-                    curseur.close()
-                    self.db.close_db()
-                    raise ValueError(
-                        f"Valeur invalide envoyée dans les prix.\n"
-                        f"Interruption complète du changement.\n"
-                    )
-            elif prices.mode == 'HPHC':
-                donnees_client = [(client_id, 'hp', prices.hp),
-                                    (client_id, 'hc', prices.hc),
-                                    (client_id, 'revente', prices.resale_price)]
-                try:
-                    curseur.executemany("""
-                        INSERT INTO prices 
-                        (client_id, type, prix) 
-                        VALUES (?, ?, ?) ON CONFLICT(client_id, type) DO UPDATE SET
-                        prix = excluded.prix
-                    """, donnees_client)
-
-        # Table 'creneaux_hp'
-                    curseur.execute("DELETE FROM creneaux_hp WHERE client_id = ?", (client_id,))
-                    list_creneaux_hp = prices.hp_slots
-                    for creneau_hp in list_creneaux_hp:
-                        donnees_client = (client_id, creneau_hp.start, creneau_hp.end)
-                        try:
-                            curseur.executemany("""
-                                INSERT INTO creneaux_hp 
-                                (client_id, heure_debut, heure_fin) 
-                                VALUES (?, ?, ?)
-                            """, donnees_client)
-                        except sqlite3.IntegrityError:
-                            curseur.close()
-                            self.db.close_db()
-                            raise ValueError(
-                                f"Valeur invalide envoyée dans les creneaux_hp.\n"
-                                f"Interruption complète du changement.\n"
-                            )
-
-                except sqlite3.IntegrityError:
-                    curseur.close()
-                    self.db.close_db()
-                    raise ValueError(
-                        f"Valeur invalide envoyée dans les prix.\n"
-                        f"Interruption complète de l'insertion.\n"
-                    )
-            else:
-                curseur.close()
-                self.db.close_db()
-                raise ValueError(
-                    f"Mode invalide dans les prix.\n"
-                    f"Interruption complète de l'insertion.\n"
-                )
+            # Table 'water_heaters'
+            if water_heater:
+                donnees_client = (client_id, water_heater.volume,
+                                  water_heater.power, water_heater.insulation_coefficient,
+                                  water_heater.cold_water_temperature)
+                self._executer(curseur, SQL_UPSERT_WH, donnees_client,
+                               _message_invalide("les water_heaters", "du changement"))
 
-        # Table 'water_heaters'
-        if water_heater:
-            donnees_client = (client_id, water_heater.volume, 
-                            water_heater.power, water_heater.insulation_coefficient, 
-                            water_heater.cold_water_temperature)
-            try:
-                curseur.execute("""
-                    INSERT INTO water_heaters
-                    (client_id, volume, power, coeff_isolation, temperature_eau_froide_celsius) 
-                    VALUES (?, ?, ?, ?, ?) ON CONFLICT(client_id) DO UPDATE SET
-                    volume = excluded.volume,
-                    power = excluded.power,
-                    coeff_isolation = excluded.coeff_isolation,
-                    temperature_eau_froide_celsius = excluded.temperature_eau_froide_celsius
-                """, donnees_client)
-            except sqlite3.IntegrityError:
-                curseur.close()
-                self.db.close_db()
-                raise ValueError(
-                    f"Valeur invalide envoyée dans les water_heaters.\n"
-                    f"Interruption complète du changement.\n"
-                )
-
-        self.db.connexion.commit() # Sauvegarder en disque
-        curseur.close()
-        self.db.close_db()
+        # Le client en cache n'est plus valide : retiré après le commit, pour qu'une lecture concurrente
+        # de l'ancien état ne puisse pas le remettre en cache (voir _mettre_en_cache)
+        self._invalider_cache(client_id)
 
     def list_all_clients(self) -> list :
         """Fonction qui liste tous les clients dans la BDD. 
@@ -819,29 +670,24 @@ class ClientManager :
         Raises : 
         - DatabaseConnexionError : Si l'accès à la BDD est impossible. 
         """
-        #TODO : Le but est de retourner la liste de tous les clients dans la BDD. 
-        # Connection avec le BDD
-        try:
-            self.db.connect_db()        
-        except DatabaseConnexionError:
-            raise DatabaseConnexionError(
-                f"Impossible de se connecter à la base de données.\n"
-                f"Chemin: {self.path_db}\n"
-            )         
-
-        # print(f"Connecté à la base de données: {self.path_db}")
-            
-        # Configurer pour retourner des dictionnaires
-        self.db.connexion.row_factory = sqlite3.Row
-        
-        # Créer un curseur pour exécuter la requête
-        curseur = self.db.connexion.cursor()
-        
-        # Faire la requête
-        curseur.execute("SELECT client_id FROM clients")
-        
-        # Récupérer tous les résultats
-        rows = curseur.fetchall()
-        liste_clients = [row["client_id"] for row in rows]
+        liste_clients = list(self.iter_all_clients())
+
+        return liste_clients
 
-        return liste_clients
\ No newline at end of file
+    def iter_all_clients(self) :
+        """Générateur des IDs de tous les clients de la BDD, lus par blocs de TAILLE_BLOC_IDS lignes :
+        la mémoire utilisée ne dépend pas du nombre de clients (à préférer à list_all_clients pour parcourir
+        une grande table). Le curseur reste ouvert tant que le générateur n'est pas épuisé ou fermé.
+        Args :
+        - Rien
+        Returns :
+        - générateur d'int (les clients_id)
+        Raises :
+        - DatabaseConnexionError : Si l'accès à la BDD est impossible.
+        """
+        with self.db.curseur() as curseur:
+            curseur.arraysize = TAILLE_BLOC_IDS
+            curseur.execute(SQL_LIST_CLIENTS)
+            while bloc := curseur.fetchmany():
+                for (client_id,) in bloc:
+                    yield client_id
@@ -2,14 +2,32 @@
 Auteur : @laura-campelo""" 
 
 from datetime import time, datetime
-from .base_db import Database
+from .base_db import Database, _to_us, _from_us
 from .exceptions_db import *
 import sqlite3
+import numpy as np
+
+
+# Ligne de décision lue directement dans un tableau NumPy structuré (date en microsecondes, puissance)
+_DTYPE_DECISION = np.dtype([("date", np.int64), ("puissance", np.float64)])
+
+
+# Requêtes SQL : constantes du module (même texte à chaque appel, donc réutilisé
+# depuis le cache de requêtes préparées de sqlite3, voir client_manager)
+SQL_INS_DECISION = "INSERT INTO decisions (client_id, date, puissance) VALUES (?, ?, ?)"
+SQL_UPD_DECISION = "UPDATE decisions SET puissance = ? WHERE client_id = ? AND date = ?"
+SQL_SEL_DECISIONS = "SELECT date, puissance FROM decisions WHERE client_id = ? ORDER BY date"
+SQL_SEL_DECISIONS_PERIODE = """SELECT date, puissance FROM decisions
+    WHERE client_id = ? AND date BETWEEN ? AND ? ORDER BY date"""
+SQL_DEL_DECISION = "DELETE FROM decisions WHERE client_id = ? AND date = ?"
+SQL_DEL_DECISIONS = "DELETE FROM decisions WHERE client_id = ?"
+
 
 class DecisionsManager :
-    def __init__(self, path_db) :
+    def __init__(self, path_db, db : Database = None) :
         self.path_db = path_db
-        self.db = Database(path_db)
+        # Une instance Database déjà ouverte sur le même fichier peut être partagée (voir DBManager)
+        self.db = db if db is not None else Database(path_db)
 
     def create_decision_in_db(self, client_id : int, date : datetime, puissance : float) -> None:
         """Fonction pour ajouter les données d'une décision dans la BDD. 
@@ -24,49 +42,38 @@ class DecisionsManager :
         - ValueError : si entrées non respectés. 
         - ClientNotFound : Si aucun client n'a l'ID client_id.
         """
+        self.bulk_create_decisions(client_id, [(date, puissance)])
+
+    def bulk_create_decisions(self, client_id : int, decisions) -> None:
+        """Fonction pour ajouter plusieurs décisions d'un client dans la BDD, en une seule transaction
+        (un seul executemany et un seul commit pour tout le lot).
+        Args :
+        - client_id : int (un entier unique représentant le client dans la BDD)
+        - decisions : itérable de tuples (date : datetime, puissance : float)
+        Returns :
+        - None (Rien car seulement écriture dans la BDD).
+        Raises :
+        - DatabaseConnexionError : si accès impossible à la BDD.
+        - ValueError : si entrées non respectés (le lot entier est annulé).
+        - ClientNotFound : Si aucun client n'a l'ID client_id.
+        """
         # Test de type de l'ID du client
         if not isinstance(client_id, int):
             raise ValueError("L'ID du client doit être un doit être un nombre entier.")
 
-        # Connection avec le BDD
-        try:
-            self.db.connect_db()        
-        except DatabaseConnexionError:
-            raise DatabaseConnexionError(
-                f"Impossible de se connecter à la base de données.\n"
-                f"Chemin: {self.path_db}\n"
-            )         
-
-        # print(f"Connecté à la base de données: {self.path_db}")
-            
-        # Configurer pour retourner des dictionnaires
-        self.db.connexion.row_factory = sqlite3.Row
-        
-        # Créer un curseur pour exécuter les requêtes
-        curseur = self.db.connexion.cursor()
-        
-        self.db.create_all_tables()
-        donnees_client = (client_id, date.isoformat(), puissance) 
-        try:
-            curseur.execute("""
-                INSERT INTO decisions 
-                (client_id, date, puissance) 
-                VALUES (?, ?, ?)
-            """, donnees_client)
-        except sqlite3.IntegrityError as e:
-            self.db.connexion.rollback() # Efacez TOUT depuis le début.
-            curseur.close()
-            self.db.close_db()
-            if "foreign key" in str(e).lower():
-                raise ClientNotFound(f"Impossible de créer une décision : Le client n'existe pas.")
-            raise ValueError(
-                f"Valeur invalide envoyée dans la décision.\n"
-                f"Interruption complète de l'insertion.\n"
-            ) 
-        
-        self.db.connexion.commit() # Sauvegarder en disque
-        curseur.close()
-        self.db.close_db()
+        with self.db.curseur() as curseur:
+            # Tout le lot dans une seule transaction (annulée entièrement en cas d'erreur)
+            with self.db.transaction_ecriture():
+                try:
+                    curseur.executemany(SQL_INS_DECISION,
+                                        ((client_id, _to_us(date), puissance) for date, puissance in decisions))
+                except sqlite3.IntegrityError as e:
+                    if "foreign key" in str(e).lower():
+                        raise ClientNotFound(f"Impossible de créer une décision : Le client n'existe pas.")
+                    raise ValueError(
+                        f"Valeur invalide envoyée dans la décision.\n"
+                        f"Interruption complète de l'insertion.\n"
+                    )
 
     def reconstitute_all_decisions(self, client_id : int) :
         """Fonction pour reconstituer toutes les decisions à partir de l'ID du client en ordre cronologique. 
@@ -84,43 +91,44 @@ class DecisionsManager :
         if not isinstance(client_id, int):
             raise ValueError("L'ID du client doit être un doit être un nombre entier.")
 
-        # Connection avec le BDD
-        try:
-            self.db.connect_db()        
-        except DatabaseConnexionError:
-            raise DatabaseConnexionError(
-                f"Impossible de se connecter à la base de données.\n"
-                f"Chemin: {self.path_db}\n"
-            )         
-
-        # print(f"Connecté à la base de données: {self.path_db}")
-            
-        # Configurer pour retourner des dictionnaires
-        self.db.connexion.row_factory = sqlite3.Row
-        
-        # Créer un curseur pour exécuter les requêtes
-        curseur = self.db.connexion.cursor()
-        
-        curseur.execute("SELECT date, puissance FROM decisions WHERE client_id=?", (client_id,))
-        
-        # Récupérer tous les résultats
-        enregistrements = curseur.fetchall()
-        
-        if not enregistrements:
-            curseur.close()
-            self.db.close_db()
+        # Lignes en simples tuples, triées par SQLite ; un seul passage : chaque ligne devient
+        # directement le dictionnaire renvoyé
+        with self.db.curseur() as curseur:
+            curseur.execute(SQL_SEL_DECISIONS, (client_id,))
+            decisions_ordonnees = [{"date": _from_us(date), "puissance": puissance}
+                                   for date, puissance in curseur]
+
+        if not decisions_ordonnees:
             raise DecisionNotFound(f"Aucune décision pour le client avec l'ID {client_id}\n")
-        else:
-            # Convertir en liste de dictionnaires
-            decisions = []
-            for ligne in enregistrements:
-                decisions.append(dict(ligne))  # Convertit Row en dictionnaire
-            for dec in decisions:
-                dec["date"] = datetime.fromisoformat(dec["date"])
-            decisions_ordonnees = sorted(decisions, key=lambda d: d["date"])
-            curseur.close()
-            self.db.close_db()
-            return decisions_ordonnees
+        return decisions_ordonnees
+
+    def reconstitute_all_decisions_arrays(self, client_id : int) :
+        """Fonction pour reconstituer toutes les decisions d'un client sous forme de tableaux NumPy,
+        en ordre cronologique, sans créer un dictionnaire ni un datetime par décision.
+        Args : 
+        - client_id : int (un entier unique représentant le client dans la BDD) 
+        Returns : 
+        - (dates, puissances) : tuple de np.ndarray de même longueur, ordonnés par date
+          (dates en datetime64[us], puissances en float64)
+        Raises : 
+        - DatabaseConnexionError : Si accès impossible à la base de données 
+        - DecisionNotFound : S'il n'y a pas de décisions pour un client 
+        - ValueError : Si l'entrée n'est pas conforme.
+        """
+
+        # Test de type de l'ID du client
+        if not isinstance(client_id, int):
+            raise ValueError("L'ID du client doit être un doit être un nombre entier.")
+
+        # Les lignes (microsecondes, puissance) sont copiées directement dans un seul tableau structuré
+        with self.db.curseur() as curseur:
+            curseur.execute(SQL_SEL_DECISIONS, (client_id,))
+            lignes = np.fromiter(curseur, dtype=_DTYPE_DECISION)
+
+        if not lignes.size:
+            raise DecisionNotFound(f"Aucune décision pour le client avec l'ID {client_id}\n")
+        # Les microsecondes depuis 1970-01-01 sont déjà la représentation de datetime64[us] : aucune conversion
+        return lignes["date"].astype("datetime64[us]"), lignes["puissance"].copy()
 
     def reconstitute_decisions(self, client_id : int, date_debut : datetime, date_fin : datetime):
         """Fonction pour reconstituer une serie de decisions entre date_debut et date_fin d'un client_id. 
@@ -145,33 +153,49 @@ class DecisionsManager :
         if date_debut > date_fin:
             raise ValueError("Dates invalides pour retrouver les decisions")
 
-        # Trouver toutes les décisions de ce client
-        try:
-            decisions_ordonnees = self.reconstitute_all_decisions(client_id=client_id)
-        except DatabaseConnexionError:
-            raise
-        except DecisionNotFound:
-            raise
-        except ValueError:
-            raise
-
-        debut = -1
-        fin = -1
-        for d in decisions_ordonnees:
-            if d["date"] < date_debut:
-                debut = debut + 1
-            elif d["date"] <= date_fin:
-                fin = fin + 1
-            else:
-                break
-        
-        if fin > -1:
-            if debut > -1:
-                return decisions_ordonnees[debut:fin+1]
-            else:
-                return decisions_ordonnees[:fin+1]
-        else:
-            raise DecisionNotFound("Période sans aucune décision.")         
+        # La période est filtrée et triée par SQLite, via la clé primaire (client_id, date) :
+        # seules les décisions de la période sont lues (comparaison d'entiers)
+        with self.db.curseur() as curseur:
+            curseur.execute(SQL_SEL_DECISIONS_PERIODE, (client_id, _to_us(date_debut), _to_us(date_fin)))
+            decisions = [{"date": _from_us(date), "puissance": puissance}
+                         for date, puissance in curseur]
+
+        if not decisions:
+            raise DecisionNotFound("Période sans aucune décision.")
+        return decisions
+
+    def reconstitute_decisions_arrays(self, client_id : int, date_debut : datetime, date_fin : datetime):
+        """Fonction pour reconstituer les decisions d'un client entre date_debut et date_fin sous forme
+        de tableaux NumPy (même période et même ordre que reconstitute_decisions, sans dictionnaires).
+        Args : 
+        - client_id : int (un entier unique représentant le client dans la BDD) 
+        - date_debut : datetime (date de début des consultations)
+        - date_fin : datetime (date de fin des consultations)
+        Returns : 
+        - (dates, puissances) : tuple de np.ndarray de même longueur, ordonnés par date
+          (dates en datetime64[us], puissances en float64)
+        Raises : 
+        - DatabaseConnexionError : Si accès impossible à la base de données 
+        - ValueError : Si l'entrée n'est pas conforme.
+        - DecisionNotFound : Si n'existe pas une décision dans la période desirée.
+        """
+
+        # Test de type de l'ID du client
+        if not isinstance(client_id, int):
+            raise ValueError("L'ID du client doit être un doit être un nombre entier.")
+
+        # Validation de dates
+        if date_debut > date_fin:
+            raise ValueError("Dates invalides pour retrouver les decisions")
+
+        # Même requête par la clé primaire, lignes copiées directement dans un tableau structuré
+        with self.db.curseur() as curseur:
+            curseur.execute(SQL_SEL_DECISIONS_PERIODE, (client_id, _to_us(date_debut), _to_us(date_fin)))
+            lignes = np.fromiter(curseur, dtype=_DTYPE_DECISION)
+
+        if not lignes.size:
+            raise DecisionNotFound("Période sans aucune décision.")
+        return lignes["date"].astype("datetime64[us]"), lignes["puissance"].copy()
 
     def delete_decision(self, client_id : int, date : datetime) :
         """Fonction qui supprime une decision de la BDD. 
@@ -189,31 +213,9 @@ class DecisionsManager :
         if not isinstance(client_id, int):
             raise ValueError("L'ID du client doit être un doit être un nombre entier.")
 
-        # Connection avec le BDD
-        try:
-            self.db.connect_db()        
-        except DatabaseConnexionError:
-            raise DatabaseConnexionError(
-                f"Impossible de se connecter à la base de données.\n"
-                f"Chemin: {self.path_db}\n"
-            )         
-
-        # print(f"Connecté à la base de données: {self.path_db}")
-            
-        # Configurer pour retourner des dictionnaires
-        self.db.connexion.row_factory = sqlite3.Row
-        
-        # Créer un curseur pour exécuter le requête
-        curseur = self.db.connexion.cursor()
-
-        curseur.execute("DELETE FROM decisions WHERE client_id = ? and date = ?", (client_id, date,))
-        
-        # Récupérer tous les résultats
-        lignes_concernees = curseur.rowcount
-
-        self.db.connexion.commit() # Sauvegarder en disque
-        curseur.close()
-        self.db.close_db()
+        with self.db.curseur() as curseur, self.db.transaction_ecriture():
+            curseur.execute(SQL_DEL_DECISION, (client_id, _to_us(date)))
+            lignes_concernees = curseur.rowcount
         
         if not lignes_concernees:
             raise ClientNotFound(f"Aucun client avec l'ID {client_id}\n")
@@ -234,31 +236,9 @@ class DecisionsManager :
         if not isinstance(client_id, int):
             raise ValueError("L'ID du client doit être un doit être un nombre entier.")
 
-        # Connection avec le BDD
-        try:
-            self.db.connect_db()        
-        except DatabaseConnexionError:
-            raise DatabaseConnexionError(
-                f"Impossible de se connecter à la base de données.\n"
-                f"Chemin: {self.path_db}\n"
-            )         
-
-        # print(f"Connecté à la base de données: {self.path_db}")
-            
-        # Configurer pour retourner des dictionnaires
-        self.db.connexion.row_factory = sqlite3.Row
-        
-        # Créer un curseur pour exécuter le requête
-        curseur = self.db.connexion.cursor()
-
-        curseur.execute("DELETE FROM decisions WHERE client_id = ?", (client_id,))
-        
-        # Récupérer tous les résultats
-        lignes_concernees = curseur.rowcount
-
-        self.db.connexion.commit() # Sauvegarder en disque
-        curseur.close()
-        self.db.close_db()
+        with self.db.curseur() as curseur, self.db.transaction_ecriture():
+            curseur.execute(SQL_DEL_DECISIONS, (client_id,))
+            lignes_concernees = curseur.rowcount
         
         if not lignes_concernees:
             raise ClientNotFound(f"Aucun client avec l'ID {client_id}\n")
@@ -276,52 +256,37 @@ class DecisionsManager :
         - ValueError : si entrées non respectés. 
         - ClientNotFound : Si aucun client n'a l'ID client_id.
         """
+        self.bulk_update_decisions(client_id, [(date, puissance)])
+
+    def bulk_update_decisions(self, client_id : int, decisions) -> None :
+        """Fonction pour mêttre à jour plusieurs décisions d'un client dans la BDD, en une seule transaction
+        (un seul executemany et un seul commit pour tout le lot).
+        Args :
+        - client_id : int (un entier unique représentant le client dans la BDD)
+        - decisions : itérable de tuples (date : datetime, puissance : float)
+        Returns :
+        - None (Rien car seulement écriture dans la BDD).
+        Raises :
+        - DatabaseConnexionError : si accès impossible à la BDD.
+        - ValueError : si entrées non respectés (le lot entier est annulé).
+        - ClientNotFound : Si une des décisions n'existe pas pour ce client (le lot entier est annulé).
+        """
         # Test de type de l'ID du client
         if not isinstance(client_id, int):
             raise ValueError("L'ID du client doit être un doit être un nombre entier.")
 
-        # Connection avec le BDD
-        try:
-            self.db.connect_db()        
-        except DatabaseConnexionError:
-            raise DatabaseConnexionError(
-                f"Impossible de se connecter à la base de données.\n"
-                f"Chemin: {self.path_db}\n"
-            )         
-
-        # print(f"Connecté à la base de données: {self.path_db}")
-            
-        # Configurer pour retourner des dictionnaires
-        self.db.connexion.row_factory = sqlite3.Row
-        
-        # Créer un curseur pour exécuter les requêtes
-        curseur = self.db.connexion.cursor()
-        
-        self.db.create_all_tables()
-        donnees_client = (puissance, client_id, date.isoformat()) 
-        try:
-            curseur.execute("""
-                UPDATE decisions 
-                SET puissance = ? 
-                WHERE client_id = ? and date = ?
-            """, donnees_client)
-        except sqlite3.IntegrityError as e:
-            self.db.connexion.rollback() # Efacez TOUT depuis le début.
-            curseur.close()
-            self.db.close_db()
-            if "foreign key" in str(e).lower():
-                raise ClientNotFound(f"Impossible d'actualiser la décision : Le client n'existe pas.")
-            raise ValueError(
-                f"Valeur invalide envoyée dans la décision.\n"
-                f"Interruption complète de l'insertion.\n"
-            ) 
-        
-        # Récupérer tous les résultats
-        lignes_concernees = curseur.rowcount
+        donnees = [(puissance, client_id, _to_us(date)) for date, puissance in decisions]
 
-        self.db.connexion.commit() # Sauvegarder en disque
-        curseur.close()
-        self.db.close_db()
-        
-        if not lignes_concernees:
-            raise ClientNotFound(f"Aucun client avec l'ID {client_id}\n")
+        with self.db.curseur() as curseur:
+            # Tout le lot dans une seule transaction (annulée entièrement en cas d'erreur)
+            with self.db.transaction_ecriture():
+                try:
+                    curseur.executemany(SQL_UPD_DECISION, donnees)
+                except sqlite3.IntegrityError:
+                    raise ValueError(
+                        f"Valeur invalide envoyée dans la décision.\n"
+                        f"Interruption complète de l'insertion.\n"
+                    )
+                # rowcount cumule les lignes modifiées par tout le lot
+                if curseur.rowcount < len(donnees):
+                    raise ClientNotFound(f"Aucune décision à ces dates pour le client avec l'ID {client_id}\n")
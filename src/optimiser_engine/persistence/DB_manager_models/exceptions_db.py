@@ -4,6 +4,9 @@ class DatabaseConnexionError(Exception):
 class DatabaseIntegrityError(Exception):
     pass
 
+class DatabaseSchemaError(Exception):
+    pass
+
 class ClientNotFound(Exception):
     pass
 
@@ -3,11 +3,14 @@ Auteur : @laura-campelo
 
 """
 
+from .base_db import Database
 from .decision_manager import DecisionsManager
 from .client_manager import ClientManager 
 
 class DBManager(DecisionsManager, ClientManager) :
     def __init__(self, path_db) :
         self.path_db = path_db 
-        DecisionsManager.__init__(self, path_db)
-        ClientManager.__init__(self, path_db)
+        # Une seule instance Database (connexions, état du schéma) pour les deux parties du manager
+        db = Database(path_db)
+        DecisionsManager.__init__(self, path_db, db)
+        ClientManager.__init__(self, path_db, db)
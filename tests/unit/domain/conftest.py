@@ -16,6 +16,7 @@ from optimiser_engine.domain import (
 )
 
 
+# Time slots, domain objects and client dictionaries are mutable: each test builds its own.
 @pytest.fixture
 def morning_slot():
     return TimeSlot(time(6, 0), time(8, 0))
@@ -31,9 +32,12 @@ def forbidden_slot():
     return TimeSlot(time(22, 0), time(23, 0))
 
 
-@pytest.fixture
+# Read-only matrix, built once per session.
+@pytest.fixture(scope="session")
 def consumption_matrix():
-    return np.full((7, 24), 250.0)
+    matrix = np.full((7, 24), 250.0)
+    matrix.flags.writeable = False  # partagée par toute la session
+    return matrix
 
 
 @pytest.fixture
@@ -65,12 +69,18 @@ def base_prices():
 
 
 @pytest.fixture
-def hphc_prices(morning_slot, evening_slot):
+def hp_slots_sorted(morning_slot, evening_slot):
+    # Already in chronological order: the hp_slots setter keeps it as is.
+    return (morning_slot, evening_slot)
+
+
+@pytest.fixture
+def hphc_prices(hp_slots_sorted):
     prices = Prices()
     prices.mode = "HPHC"
     prices.hp = 0.30
     prices.hc = 0.12
-    prices.hp_slots = [morning_slot, evening_slot]
+    prices.hp_slots = list(hp_slots_sorted)
     prices.resale_price = 0.06
     return prices
 
@@ -114,7 +124,7 @@ def client_dict_base(consumption_matrix):
             "forbidden_slots": [
                 {"start": "22:00", "end": "23:00"},
             ],
-            "consumption_profile": [[float(v) for v in row] for row in consumption_matrix.tolist()],
+            "consumption_profile": consumption_matrix.tolist(),
         },
         "planning": [
             {"day": 0, "time": "07:00", "target_temp": 55.0, "volume": 30.0},
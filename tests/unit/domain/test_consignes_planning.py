@@ -4,6 +4,11 @@ from datetime import time
 from optimiser_engine.domain import Setpoint, Planning
 
 
+@pytest.fixture
+def default_planning():
+    return Planning()
+
+
 def test_setpoint_valid_initialization():
     consigne = Setpoint(day=1, time_of_day=time(8, 15), temperature=60.0, volume=35.0)
 
@@ -35,26 +40,23 @@ def test_setpoint_rejects_negative_volume():
         Setpoint(day=0, time_of_day=time(7, 0), temperature=55.0, volume=-1.0)
 
 
-def test_planning_setter_validates_list_content():
-    planning = Planning()
-
+def test_planning_setter_validates_list_content(default_planning):
     with pytest.raises(TypeError):
-        planning.setpoints = "invalid"
+        default_planning.setpoints = "invalid"
 
     with pytest.raises(TypeError):
-        planning.setpoints = ["not-setpoint"]
+        default_planning.setpoints = ["not-setpoint"]
 
 
-def test_planning_sorts_and_keeps_hottest_duplicate():
-    planning = Planning()
+def test_planning_sorts_and_keeps_hottest_duplicate(default_planning):
     s1 = Setpoint(0, time(7, 0), 55.0, volume=20.0)
     s2 = Setpoint(0, time(7, 0), 60.0, volume=15.0)  # hotter duplicate
     s3 = Setpoint(0, time(6, 30), 50.0, volume=10.0)
 
-    planning.setpoints = [s1, s2, s3]
+    default_planning.setpoints = [s1, s2, s3]
 
-    assert [c.temperature for c in planning.setpoints] == [50.0, 60.0]
-    assert planning.setpoints[0].time < planning.setpoints[1].time
+    assert [c.temperature for c in default_planning.setpoints] == [50.0, 60.0]
+    assert default_planning.setpoints[0].time < default_planning.setpoints[1].time
 
 
 def test_add_setpoint_preserves_order_and_validation(planning_single_setpoint):
@@ -77,14 +79,13 @@ def test_remove_setpoint_returns_boolean(planning_single_setpoint):
     assert planning.remove_setpoint(jour=0, heure=time(7, 0)) is False
 
 
-def test_get_future_setpoints_respects_horizon_and_week_wrap():
-    planning = Planning()
+def test_get_future_setpoints_respects_horizon_and_week_wrap(default_planning):
     sunday_evening = Setpoint(6, time(23, 30), 50.0, volume=10.0)
     monday_morning = Setpoint(0, time(1, 0), 55.0, volume=20.0)
     tuesday_event = Setpoint(1, time(10, 0), 48.0, volume=5.0)
-    planning.setpoints = [monday_morning, sunday_evening, tuesday_event]
+    default_planning.setpoints = [monday_morning, sunday_evening, tuesday_event]
 
-    results = planning.get_future_setpoints(
+    results = default_planning.get_future_setpoints(
         jour_actuel=6, heure_actuelle=time(23, 0), horizon_heures=3
     )
 
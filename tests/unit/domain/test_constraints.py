@@ -6,6 +6,11 @@ from optimiser_engine.domain.constraints import ConsumptionProfile, Constraints,
 from optimiser_engine.domain.common import TimeSlot
 
 
+@pytest.fixture
+def default_constraints():
+    return Constraints()
+
+
 def test_consumption_profile_defaults_use_background_noise():
     profile = ConsumptionProfile()
 
@@ -28,6 +33,20 @@ def test_consumption_profile_get_vector_interpolates_linearly():
     np.testing.assert_allclose(vector, [0.5, 1.5])
 
 
+def test_consumption_profile_get_vector_batch_matches_get_vector():
+    matrix = np.arange(7 * 24, dtype=float).reshape(7, 24)
+    profile = ConsumptionProfile(matrix_7x24=matrix)
+    starts = [datetime(2024, 1, 1, 0, 30), datetime(2024, 1, 7, 23, 15), datetime(2024, 1, 3, 12, 0)]
+
+    batch = profile.get_vector_batch(starts, N=6, step_min=15)
+
+    assert batch.shape == (3, 6)
+    for row, start in zip(batch, starts):
+        np.testing.assert_allclose(row, profile.get_vector(start_date=start, N=6, step_min=15))
+    with pytest.raises(TypeError):
+        profile.get_vector_batch(["2024-01-01"], N=2, step_min=60)
+
+
 def test_consumption_profile_get_vector_validations():
     profile = ConsumptionProfile()
     start = datetime(2024, 1, 1, 0, 0)
@@ -40,31 +59,28 @@ def test_consumption_profile_get_vector_validations():
         profile.get_vector(start_date=start, N=2, step_min=0)
 
 
-def test_constraints_defaults_and_type_enforcement():
-    constraints = Constraints()
-
-    assert isinstance(constraints.consumption_profile, ConsumptionProfile)
-    assert constraints.forbidden_slots == []
-    assert constraints.minimum_temperature == 10.0
+def test_constraints_defaults_and_type_enforcement(default_constraints):
+    assert isinstance(default_constraints.consumption_profile, ConsumptionProfile)
+    assert default_constraints.forbidden_slots == []
+    assert default_constraints.minimum_temperature == 10.0
 
     with pytest.raises(TypeError):
-        constraints.forbidden_slots = "not-a-list"
+        default_constraints.forbidden_slots = "not-a-list"
     with pytest.raises(TypeError):
-        constraints.forbidden_slots = ["bad-item"]
+        default_constraints.forbidden_slots = ["bad-item"]
 
 
-def test_constraints_forbidden_slots_overlap_validation():
-    c = Constraints()
+def test_constraints_forbidden_slots_overlap_validation(default_constraints):
     slot_a = TimeSlot(time(8, 0), time(10, 0))
     slot_b = TimeSlot(time(9, 30), time(11, 0))
 
-    c.forbidden_slots = [slot_a]
+    default_constraints.forbidden_slots = [slot_a]
     with pytest.raises(ValueError):
-        c.forbidden_slots = [slot_a, slot_b]
+        default_constraints.forbidden_slots = [slot_a, slot_b]
 
-    c.forbidden_slots = [slot_a]
+    default_constraints.forbidden_slots = [slot_a]
     with pytest.raises(ValueError):
-        c.add_forbidden_slot(start=time(9, 45), end=time(10, 30))
+        default_constraints.add_forbidden_slot(start=time(9, 45), end=time(10, 30))
 
 
 def test_constraints_is_allowed_checks_time(forbidden_slot):
@@ -76,14 +92,21 @@ def test_constraints_is_allowed_checks_time(forbidden_slot):
     assert c.is_allowed(time(23, 0)) is True
 
 
+def test_constraints_allowed_mask_matches_is_allowed(forbidden_slot):
+    c = Constraints(forbidden_slots=[forbidden_slot])
+    start = datetime(2024, 1, 1, 21, 0)
+    instants = [time((21 * 60 + 15 * i) // 60 % 24, 15 * i % 60) for i in range(200)]
+
+    assert c.allowed_mask(start, 200, 15).tolist() == [c.is_allowed(t) for t in instants]
+    assert Constraints().allowed_mask(start, 200, 15).all()
+
+
 @pytest.mark.parametrize("temp_value", [-1, 120, "hot"])
-def test_constraints_minimum_temperature_validation(temp_value):
-    c = Constraints()
+def test_constraints_minimum_temperature_validation(temp_value, default_constraints):
     with pytest.raises(ValueError):
-        c.minimum_temperature = temp_value
+        default_constraints.minimum_temperature = temp_value
 
 
-def test_constraints_consumption_profile_type_validation():
-    c = Constraints()
+def test_constraints_consumption_profile_type_validation(default_constraints):
     with pytest.raises(TypeError):
-        c.consumption_profile = "not-a-profile"
+        default_constraints.consumption_profile = "not-a-profile"
@@ -1,11 +1,16 @@
 import pytest
-from datetime import time
+from datetime import datetime, time, timedelta
 
 from optimiser_engine.domain.features_models import Features, OptimizationMode
 from optimiser_engine.domain.prices_model import Prices, ModeIncompatibleError
 from optimiser_engine.domain.common import TimeSlot
 
 
+@pytest.fixture
+def default_prices():
+    return Prices()
+
+
 def test_features_valid_initialization(valid_features):
     assert valid_features.gradation is True
     assert valid_features.mode == OptimizationMode.AUTOCONS
@@ -18,59 +23,69 @@ def test_features_rejects_invalid_inputs():
         Features(gradation=True, mode="COST")
 
 
-def test_prices_base_mode_blocks_hphc_attributes():
-    prices = Prices()
-    prices.mode = "BASE"
-    prices.base = 0.19
+def test_prices_base_mode_blocks_hphc_attributes(default_prices):
+    default_prices.mode = "BASE"
+    default_prices.base = 0.19
 
-    assert prices.get_current_purchase_price(time(12, 0)) == 0.19
+    assert default_prices.get_current_purchase_price(time(12, 0)) == 0.19
     with pytest.raises(ModeIncompatibleError):
-        _ = prices.hp
+        _ = default_prices.hp
     with pytest.raises(ModeIncompatibleError):
-        prices.hp_slots
+        default_prices.hp_slots
 
 
-def test_prices_switch_to_hphc_and_compute_current_price(morning_slot, evening_slot):
-    prices = Prices()
-    prices.mode = "HPHC"
-    prices.hp = 0.28
-    prices.hc = 0.11
-    prices.hp_slots = [evening_slot, morning_slot]  # deliberately unsorted
-    prices.resale_price = 0.07
+def test_prices_switch_to_hphc_and_compute_current_price(morning_slot, evening_slot, default_prices):
+    default_prices.mode = "HPHC"
+    default_prices.hp = 0.28
+    default_prices.hc = 0.11
+    default_prices.hp_slots = [evening_slot, morning_slot]  # deliberately unsorted
+    default_prices.resale_price = 0.07
 
     # slots should be sorted inside the setter
-    assert prices.hp_slots[0].start == morning_slot.start
-    assert prices.get_current_purchase_price(time(6, 30)) == 0.28
-    assert prices.get_current_purchase_price(time(9, 0)) == 0.11
+    assert default_prices.hp_slots[0].start == morning_slot.start
+    assert default_prices.get_current_purchase_price(time(6, 30)) == 0.28
+    assert default_prices.get_current_purchase_price(time(9, 0)) == 0.11
 
     with pytest.raises(ModeIncompatibleError):
-        _ = prices.base
+        _ = default_prices.base
+
+
+def test_prices_vectors_match_pointwise_price(hphc_prices, default_prices):
+    start = datetime(2024, 1, 1, 5, 50, 30)
+    instants = [(start + timedelta(minutes=10 * i)).time() for i in range(300)]
+
+    mask = hphc_prices.hp_mask(start, 300, 10)
+    vector = hphc_prices.get_purchase_vector(start, 300, 10)
+    assert vector.tolist() == [hphc_prices.get_current_purchase_price(t) for t in instants]
+    assert mask.tolist() == [price == hphc_prices.hp for price in vector]
+    assert mask.any() and not mask.all()
+
+    assert not default_prices.hp_mask(start, 300, 10).any()
+    assert default_prices.get_purchase_vector(start, 300, 10).tolist() == [default_prices.base] * 300
 
 
-def test_hp_slots_validation_errors():
-    prices = Prices()
-    prices.mode = "HPHC"
+def test_hp_slots_validation_errors(default_prices):
+    default_prices.mode = "HPHC"
 
     with pytest.raises(TypeError):
-        prices.hp_slots = "not-a-list"
+        default_prices.hp_slots = "not-a-list"
 
     with pytest.raises(TypeError):
-        prices.hp_slots = [TimeSlot(time(6, 0), time(7, 0)), "bad"]
+        default_prices.hp_slots = [TimeSlot(time(6, 0), time(7, 0)), "bad"]
 
     with pytest.raises(ValueError):
-        prices.hp_slots = [
+        default_prices.hp_slots = [
             TimeSlot(time(6, 0), time(8, 0)),
             TimeSlot(time(7, 30), time(9, 0)),
         ]
 
     with pytest.raises(ValueError):
-        prices.hp_slots = []
+        default_prices.hp_slots = []
 
 
-def test_prices_mode_validation_and_resale_price():
-    prices = Prices()
+def test_prices_mode_validation_and_resale_price(default_prices):
     with pytest.raises(ValueError):
-        prices.mode = "INVALID"
+        default_prices.mode = "INVALID"
 
     with pytest.raises(ValueError):
-        prices.resale_price = -1
+        default_prices.resale_price = -1
@@ -3,6 +3,11 @@ import pytest
 from optimiser_engine.domain.water_heater_model import WaterHeater
 
 
+@pytest.fixture
+def default_heater():
+    return WaterHeater(volume=100, power=2000)
+
+
 def test_water_heater_valid_initialization(water_heater):
     assert water_heater.volume == 150
     assert water_heater.power == 2500
@@ -17,24 +22,21 @@ def test_water_heater_valid_initialization(water_heater):
         ("power", -5),
     ],
 )
-def test_water_heater_rejects_negative_numbers(attr_name, value):
-    heater = WaterHeater(volume=100, power=2000)
+def test_water_heater_rejects_negative_numbers(attr_name, value, default_heater):
     with pytest.raises(ValueError):
-        setattr(heater, attr_name, value)
+        setattr(default_heater, attr_name, value)
 
 
 @pytest.mark.parametrize("value", [-0.1, "bad"])
-def test_insulation_coefficient_validation(value):
-    heater = WaterHeater(volume=100, power=2000)
+def test_insulation_coefficient_validation(value, default_heater):
     with pytest.raises(ValueError):
-        heater.insulation_coefficient = value
+        default_heater.insulation_coefficient = value
 
 
 @pytest.mark.parametrize("value", [-5, "cold"])
-def test_cold_water_temperature_validation(value):
-    heater = WaterHeater(volume=100, power=2000)
+def test_cold_water_temperature_validation(value, default_heater):
     with pytest.raises(ValueError):
-        heater.cold_water_temperature = value
+        default_heater.cold_water_temperature = value
 
 
 def test_calculate_heating_temperature_increases_linearly():
@@ -0,0 +1,45 @@
+"""Test doubles shared by the solver and service tests: fake scipy results and a fake Solver."""
+
+
+class DummyRes:
+    """Minimal stand-in for the OptimizeResult returned by scipy's linprog and milp."""
+
+    def __init__(self, x, success=True, fun=0.0, message="ok"):
+        self.success = success
+        self.x = x
+        self.fun = fun
+        self.message = message
+
+
+def install_fake_scipy_solver(monkeypatch, name, result):
+    """Replace ``optimiser_engine.engine.solver.<name>`` (``linprog`` or ``milp``) by a fake returning ``result``.
+
+    Returns the dict filled with the keyword arguments of the last call.
+    """
+    calls = {}
+
+    def fake(**kwargs):
+        calls.update(kwargs)
+        return result
+
+    monkeypatch.setattr(f"optimiser_engine.engine.solver.{name}", fake)
+    return calls
+
+
+class DummySolver:
+    """Records the inputs passed to ``solve`` and returns a fixed trajectory."""
+
+    def __init__(self, trajectory="trajectory"):
+        self.trajectory = trajectory
+        self.inputs = None
+
+    def solve(self, inputs):
+        self.inputs = inputs
+        return self.trajectory
+
+
+def install_dummy_solver(monkeypatch):
+    """Make ``OptimizerService`` build a ``DummySolver``; returns it to inspect the received inputs."""
+    solver = DummySolver()
+    monkeypatch.setattr("optimiser_engine.engine.service.Solver", lambda: solver)
+    return solver
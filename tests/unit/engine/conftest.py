@@ -1,7 +1,12 @@
+import copy
 import numpy as np
 import pytest
 from datetime import datetime, time
 
+# Every module of optimiser_engine.engine imports scipy (engine/__init__ -> service -> solver):
+# checked once here, before the imports below, so the whole directory is skipped cleanly without it.
+pytest.importorskip("scipy.optimize")
+
 from optimiser_engine.domain import (
     Client,
     Constraints,
@@ -20,16 +25,21 @@ from optimiser_engine.engine.models.trajectory import TrajectorySystem
 
 DEFAULT_HORIZON_HOURS = 1
 DEFAULT_STEP_MINUTES = 15
+NUM_STEPS = int(DEFAULT_HORIZON_HOURS * 60 / DEFAULT_STEP_MINUTES)
+REFERENCE_DATETIME = datetime(2024, 1, 1, 6, 0, 0)
 
+# Domain objects and system configurations are mutable: each test builds its own.
+# The context arrays and the external context are read-only inputs, built once per session.
 
-@pytest.fixture
+
+@pytest.fixture(scope="session")
 def reference_datetime() -> datetime:
-    return datetime(2024, 1, 1, 6, 0, 0)
+    return REFERENCE_DATETIME
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def num_steps() -> int:
-    return int(DEFAULT_HORIZON_HOURS * 60 / DEFAULT_STEP_MINUTES)
+    return NUM_STEPS
 
 
 @pytest.fixture
@@ -143,21 +153,33 @@ def system_config_binary(client_cost_binary: Client) -> SystemConfig:
     return SystemConfig.from_client(client_cost_binary)
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def context_arrays(num_steps: int):
-    return {
-        "prices_purchase": np.full(num_steps, 0.2),
-        "prices_sell": np.full(num_steps, 0.05),
-        "solar_production": np.array([0.0, 50.0, 0.0, 0.0][:num_steps], dtype=float),
-        "house_consumption": np.full(num_steps, 100.0),
-        "water_draws": np.array([0.0, 5.0, 0.0, 5.0][:num_steps], dtype=float),
-        "future_setpoints": np.full(num_steps, 45.0),
-        "availability_on": np.ones(num_steps),
-        "off_peak_hours": np.ones(num_steps),
-    }
-
-
-@pytest.fixture
+    # One (8, num_steps) allocation; each context array is a row view of it.
+    names = (
+        "prices_purchase",
+        "prices_sell",
+        "solar_production",
+        "house_consumption",
+        "water_draws",
+        "future_setpoints",
+        "availability_on",
+        "off_peak_hours",
+    )
+    matrix = np.empty((len(names), num_steps))
+    matrix[0] = 0.2
+    matrix[1] = 0.05
+    matrix[2] = [0.0, 50.0, 0.0, 0.0][:num_steps]
+    matrix[3] = 100.0
+    matrix[4] = [0.0, 5.0, 0.0, 5.0][:num_steps]
+    matrix[5] = 45.0
+    matrix[6:] = 1.0
+    # Shared by the whole session: an in-place write raises instead of leaking into other tests.
+    matrix.setflags(write=False)
+    return dict(zip(names, matrix))
+
+
+@pytest.fixture(scope="session")
 def external_context_with_data(
     num_steps: int, reference_datetime: datetime, context_arrays
 ) -> ExternalContext:
@@ -180,9 +202,11 @@ def external_context_with_data(
 def optimization_inputs_cost(
     system_config_gradation: SystemConfig, external_context_with_data: ExternalContext
 ) -> OptimizationInputs:
+    # Shallow copy of the shared context: the test may set its attributes to None,
+    # while the numpy arrays, never modified in place, stay shared.
     return OptimizationInputs(
         system_config_gradation,
-        external_context_with_data,
+        copy.copy(external_context_with_data),
         initial_temperature=50.0,
         mode=OptimizationMode.COST,
     )
@@ -1,15 +1,22 @@
+import functools
 from datetime import timedelta
 
 import numpy as np
 import pandas as pd
 import pytest
 
-pytest.importorskip("scipy.optimize")
-
 from optimiser_engine.engine.models.optimisation_inputs import OptimizationInputs
 from optimiser_engine.engine.models.Exceptions import WeatherNotValid
 from optimiser_engine.engine.service import OptimizerService
 
+from ._solver_doubles import install_dummy_solver
+
+
+@functools.lru_cache(maxsize=8)
+def _cached_index(start, periods):
+    # DatetimeIndex is immutable: the same index can back the DataFrames of several tests.
+    return pd.date_range(start, periods=periods, freq="15min")
+
 
 def test_optimizer_service_horizon_and_step_validation():
     service = OptimizerService(horizon_hours=2, step_minutes=15)
@@ -29,7 +36,7 @@ def test_optimizer_service_horizon_and_step_validation():
 def test_is_df_valid_and_normalize(reference_datetime):
     service = OptimizerService(horizon_hours=1, step_minutes=15)
     start = reference_datetime
-    good_df = pd.DataFrame({"prod": [1, 2, 3, 4, 5]}, index=pd.date_range(start, periods=5, freq="15T"))
+    good_df = pd.DataFrame({"prod": [1, 2, 3, 4, 5]}, index=_cached_index(start, 5))
 
     assert service._is_df_valid(good_df, start, start + timedelta(hours=1))
 
@@ -51,7 +58,7 @@ def test_trajectory_of_client_uses_solver(monkeypatch, client_autocons, referenc
     service = OptimizerService(horizon_hours=1, step_minutes=15)
     production_df = pd.DataFrame(
         {"prod": np.arange(num_steps + 1, dtype=float)},
-        index=pd.date_range(reference_datetime, periods=num_steps + 1, freq="15T"),
+        index=_cached_index(reference_datetime, num_steps + 1),
     )
 
     def fake_to_array(self, df_normalized):
@@ -60,14 +67,7 @@ def test_trajectory_of_client_uses_solver(monkeypatch, client_autocons, referenc
 
     monkeypatch.setattr(OptimizerService, "_to_array", fake_to_array)
 
-    captured = {}
-
-    class DummySolver:
-        def solve(self, inputs):
-            captured["inputs"] = inputs
-            return "trajectory"
-
-    monkeypatch.setattr("optimiser_engine.engine.service.Solver", lambda: DummySolver())
+    solver = install_dummy_solver(monkeypatch)
 
     trajectory = service.trajectory_of_client(
         client_autocons,
@@ -77,7 +77,7 @@ def test_trajectory_of_client_uses_solver(monkeypatch, client_autocons, referenc
     )
 
     assert trajectory == "trajectory"
-    assert isinstance(captured["inputs"], OptimizationInputs)
+    assert isinstance(solver.inputs, OptimizationInputs)
 
 
 def test_trajectory_of_client_raises_weather_error(monkeypatch, client_autocons, reference_datetime):
@@ -1,28 +1,15 @@
 import numpy as np
 import pytest
 
-pytest.importorskip("scipy.optimize")
-
 from optimiser_engine.engine.solver import Solver
 
+from ._solver_doubles import DummyRes, install_fake_scipy_solver
 
-def test_solver_calls_linprog_for_gradation(monkeypatch, optimization_inputs_cost, num_steps):
-    calls = {}
-
-    class DummyRes:
-        def __init__(self):
-            self.success = True
-            self.x = np.arange(4 * num_steps + 1, dtype=float)
-            self.fun = 12.0
-            self.message = "ok"
 
-    def fake_linprog(c, A_eq, b_eq, bounds, method, options):
-        calls["c"] = c
-        calls["bounds"] = bounds
-        calls["options"] = options
-        return DummyRes()
-
-    monkeypatch.setattr("optimiser_engine.engine.solver.linprog", fake_linprog)
+def test_solver_calls_linprog_for_gradation(monkeypatch, optimization_inputs_cost, num_steps):
+    calls = install_fake_scipy_solver(
+        monkeypatch, "linprog", DummyRes(np.arange(4 * num_steps + 1, dtype=float), fun=12.0)
+    )
 
     solver = Solver(timeout=3)
     traj = solver.solve(optimization_inputs_cost)
@@ -34,16 +21,9 @@ def test_solver_calls_linprog_for_gradation(monkeypatch, optimization_inputs_cos
 
 
 def test_solver_raises_runtime_error_on_milp_failure(monkeypatch, optimization_inputs_binary, num_steps):
-    class DummyRes:
-        def __init__(self):
-            self.success = False
-            self.x = np.zeros(4 * num_steps + 1)
-            self.message = "failed"
-
-    def fake_milp(**kwargs):
-        return DummyRes()
-
-    monkeypatch.setattr("optimiser_engine.engine.solver.milp", fake_milp)
+    install_fake_scipy_solver(
+        monkeypatch, "milp", DummyRes(np.zeros(4 * num_steps + 1), success=False, message="failed")
+    )
 
     solver = Solver(timeout=1)
     with pytest.raises(RuntimeError):
@@ -51,21 +31,9 @@ def test_solver_raises_runtime_error_on_milp_failure(monkeypatch, optimization_i
 
 
 def test_solver_uses_integrality_vector_for_milp(monkeypatch, optimization_inputs_binary, num_steps):
-    captured = {}
-
-    class DummyRes:
-        def __init__(self):
-            self.success = True
-            self.x = np.ones(4 * num_steps + 1, dtype=float)
-            self.fun = 2.5
-            self.message = "ok"
-
-    def fake_milp(c, constraints, integrality, bounds, options):
-        captured["integrality"] = integrality
-        captured["bounds"] = bounds
-        return DummyRes()
-
-    monkeypatch.setattr("optimiser_engine.engine.solver.milp", fake_milp)
+    captured = install_fake_scipy_solver(
+        monkeypatch, "milp", DummyRes(np.ones(4 * num_steps + 1, dtype=float), fun=2.5)
+    )
 
     solver = Solver(timeout=2)
     traj = solver.solve(optimization_inputs_binary)
@@ -47,6 +47,26 @@ def test_update_X_and_accessors_produce_vectors(empty_trajectory, num_steps):
     assert 0.0 <= ratio <= 1.0
 
 
+def test_update_X_temperatures_match_step_by_step_simulation(empty_trajectory, num_steps):
+    traj = empty_trajectory
+    decisions = np.zeros(num_steps)
+    decisions[::3] = 1.0
+    with pytest.warns(UpdateRequired):
+        traj.x = decisions
+    traj.update_X()
+
+    cfg, ctx = traj.config_system, traj.context
+    step = ctx.step_minutes
+    gain = cfg.power * step * 60 / (cfg.volume * 4185)
+    rho = ctx.water_draws / cfg.volume
+    expected = [traj.initial_temperature]
+    for t in range(num_steps):
+        nxt = expected[-1] * (1 - rho[t]) + rho[t] * cfg.T_cold_water + gain * decisions[t] - cfg.heat_loss_coefficient * step
+        expected.append(max(nxt, cfg.T_cold_water))
+
+    np.testing.assert_allclose(traj.get_temperatures(), expected)
+
+
 def test_compute_cost_returns_cached_when_solver_delivered(empty_trajectory, num_steps):
     traj = empty_trajectory
     with pytest.warns(UpdateRequired):
@@ -96,3 +116,15 @@ def test_upload_methods_enforce_mode(empty_trajectory, num_steps):
     traj.upload_cost(1.5)
 
     assert traj.compute_cost() == pytest.approx(1.5)
+
+
+def test_upload_X_vector_copies_caller_array(empty_trajectory, num_steps):
+    traj = empty_trajectory
+    traj.make_solver_traj()
+    full_vec = np.zeros(4 * num_steps + 1)
+    traj.upload_X_vector(full_vec)
+
+    traj.update_X()
+
+    assert traj.X is not full_vec
+    np.testing.assert_array_equal(full_vec, np.zeros(4 * num_steps + 1))
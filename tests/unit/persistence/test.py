@@ -27,22 +27,36 @@ class TestDBManagerFull(unittest.TestCase):
     def setUpClass(cls):
         cls.db_path = "test_integration_complete.db"
         cls.manager = DBManager(cls.db_path)
+        # Banco e esquema criados uma única vez para a classe
+        cls._remover_arquivos_db()
+        cls.manager.db.connect_db()
+        cls.manager.db.create_all_tables()
+        cls.manager.db.close_db()
 
-    def setUp(self):
-        # Limpa o banco antes de cada teste para garantir isolamento
-        if os.path.exists(self.db_path):
-            os.remove(self.db_path)
-        self.manager.db.connect_db()
-        self.manager.db.create_all_tables()
-        self.manager.db.close_db()
+    @classmethod
+    def tearDownClass(cls):
+        cls.manager.close()
+        cls._remover_arquivos_db()
 
-    def tearDown(self):
-        if os.path.exists(self.db_path):
+    @classmethod
+    def _remover_arquivos_db(cls):
+        # O arquivo do banco e os arquivos do modo WAL (-wal, -shm)
+        for sufixo in ("", "-wal", "-shm"):
             try:
-                os.remove(self.db_path)
-            except:
+                os.remove(cls.db_path + sufixo)
+            except OSError:
                 pass
 
+    def setUp(self):
+        # Limpa o banco antes de cada teste para garantir isolamento: um único DELETE em clients,
+        # as linhas dependentes são apagadas pelo ON DELETE CASCADE (sem recriar arquivo nem esquema)
+        with self.manager.db.curseur() as curseur, self.manager.db.transaction_ecriture():
+            curseur.execute("DELETE FROM clients")
+
+    def tearDown(self):
+        # Fecha as conexões mantidas pelo manager e esvazia o seu cache de clientes
+        self.manager.close()
+
     def create_dummy_client(self, client_id):
         """Cria um objeto Client populado para testes"""
         features = Features(gradation=True, mode=OptimizationMode.AUTOCONS)
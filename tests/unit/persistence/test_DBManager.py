@@ -2,9 +2,14 @@
 
 import unittest
 import os
+import gc
+import io
 import json
+import sqlite3
+import threading
+from unittest import mock
 import numpy as np
-from datetime import datetime, time
+from datetime import datetime, time, timedelta, timezone
 
 import sys
 from pathlib import Path
@@ -15,11 +20,14 @@ path_to_src = Path(__file__).resolve().parents[3] / "src"
 sys.path.append(str(path_to_src))
 
 # Agora você importa normalmente a partir do pacote optimiser_engine
-from optimiser_engine.persistence.DB_manager_models.exceptions_db import ClientNotFound
+from optimiser_engine.persistence.DB_manager_models.exceptions_db import ClientNotFound, DatabaseIntegrityError, DatabaseSchemaError, DecisionNotFound
 from optimiser_engine.persistence.DB_manager_models.main_manager import DBManager
+from optimiser_engine.persistence.DB_manager_models.client_manager import ClientManager
+from optimiser_engine.persistence.DB_manager_models.decision_manager import DecisionsManager, SQL_SEL_DECISIONS_PERIODE
+from optimiser_engine.persistence.DB_manager_models.base_db import Database, SCHEMA_VERSION
 from optimiser_engine.domain import (
     Client, Features, WaterHeater, Constraints, 
-    ConsumptionProfile, Planning, Prices, OptimizationMode, TimeSlot
+    ConsumptionProfile, Planning, Prices, OptimizationMode, TimeSlot, Setpoint
 )
 
 class TestDBManagerFull(unittest.TestCase):
@@ -28,21 +36,36 @@ class TestDBManagerFull(unittest.TestCase):
     def setUpClass(cls):
         cls.db_path = "test_integration.db"
         cls.manager = DBManager(cls.db_path)
+        # Banco e esquema criados uma única vez para a classe
+        cls._remover_arquivos_db()
+        cls.manager.db.connect_db()
+        cls.manager.db.create_all_tables()
+        cls.manager.db.close_db()
 
-    def setUp(self):
-        if os.path.exists(self.db_path):
-            os.remove(self.db_path)
-        self.manager.db.connect_db()
-        self.manager.db.create_all_tables()
-        self.manager.db.close_db()
+    @classmethod
+    def tearDownClass(cls):
+        cls.manager.close()
+        cls._remover_arquivos_db()
 
-    def tearDown(self):
-        if os.path.exists(self.db_path):
+    @classmethod
+    def _remover_arquivos_db(cls):
+        # O arquivo do banco e os arquivos do modo WAL (-wal, -shm)
+        for sufixo in ("", "-wal", "-shm"):
             try:
-                os.remove(self.db_path)
-            except:
+                os.remove(cls.db_path + sufixo)
+            except OSError:
                 pass
 
+    def setUp(self):
+        # Limpa o banco antes de cada teste para garantir isolamento: um único DELETE em clients,
+        # as linhas dependentes são apagadas pelo ON DELETE CASCADE (sem recriar arquivo nem esquema)
+        with self.manager.db.curseur() as curseur, self.manager.db.transaction_ecriture():
+            curseur.execute("DELETE FROM clients")
+
+    def tearDown(self):
+        # Fecha as conexões mantidas pelo manager e esvazia o seu cache de clientes
+        self.manager.close()
+
     def create_dummy_client(self, client_id):
         """Helper para criar um objeto Client completo exigido pelo seu domínio"""
         features = Features(gradation=False, mode=OptimizationMode.AUTOCONS)
@@ -62,7 +85,7 @@ class TestDBManagerFull(unittest.TestCase):
             prices=prices
         )
 
-    def test_constraints_json_integrity(self):
+    def test_constraints_npy_integrity(self):
         client_id = 101
         test_matrix = np.random.rand(7, 24)
         
@@ -72,14 +95,21 @@ class TestDBManagerFull(unittest.TestCase):
 
         self.manager.create_client_in_db(client)
 
-        # 1. Verifica se o nome da coluna no DB está correto (profil_conso_json)
+        # 1. Verifica se o nome da coluna no DB está correto (profil_conso_npy, binário NPY)
         self.manager.db.connect_db()
         cursor = self.manager.db.connexion.cursor()
-        cursor.execute("SELECT profil_conso_json FROM constraints WHERE client_id = ?", (client_id,))
-        raw_json = cursor.fetchone()[0]
+        # CAST : lê os bytes brutos, sem o conversor NPARRAY
+        cursor.execute("SELECT CAST(profil_conso_npy AS BLOB) FROM constraints WHERE client_id = ?", (client_id,))
+        raw_npy = cursor.fetchone()[0]
+        # Sem CAST, o conversor devolve diretamente um np.ndarray
+        cursor.execute("SELECT profil_conso_npy FROM constraints WHERE client_id = ?", (client_id,))
+        self.assertIsInstance(cursor.fetchone()[0], np.ndarray)
         self.manager.db.close_db()
 
-        self.assertIsInstance(raw_json, str)
+        self.assertIsInstance(raw_npy, bytes)
+        self.assertTrue(raw_npy.startswith(b"\x93NUMPY"))
+        # Matriz 7x24 armazenada em float32
+        self.assertEqual(np.load(io.BytesIO(raw_npy)).dtype, np.float32)
         
         # 2. Verifica a reconstituição do objeto
         reconstituted = self.manager.reconstitute_client(client_id)
@@ -88,6 +118,322 @@ class TestDBManagerFull(unittest.TestCase):
             test_matrix
         )
 
+    def test_time_slots_stored_as_minutes(self):
+        client_id = 202
+        client = self.create_dummy_client(client_id)
+        client.constraints.forbidden_slots = [TimeSlot(start=time(0, 0), end=time(6, 30))]
+        client.planning = Planning([Setpoint(2, time(21, 45), 58.0)])
+
+        self.manager.create_client_in_db(client)
+
+        # As horas são armazenadas em minutos desde a meia-noite
+        self.manager.db.connect_db()
+        cursor = self.manager.db.connexion.cursor()
+        cursor.execute("SELECT heure_debut, heure_fin FROM plages_interdites WHERE client_id = ?", (client_id,))
+        self.assertEqual(tuple(cursor.fetchone()), (0, 390))
+        cursor.execute("SELECT heure_debut, heure_fin FROM creneaux_hp WHERE client_id = ? ORDER BY heure_debut", (client_id,))
+        self.assertEqual([tuple(r) for r in cursor.fetchall()], [(480, 720), (1080, 1320)])
+        cursor.execute("SELECT day, moment FROM consignes WHERE client_id = ?", (client_id,))
+        self.assertEqual(tuple(cursor.fetchone()), (2, 1305))
+        self.manager.db.close_db()
+
+        reconstituted = self.manager.reconstitute_client(client_id)
+        slot = reconstituted.constraints.forbidden_slots[0]
+        self.assertEqual((slot.start, slot.end), (time(0, 0), time(6, 30)))
+        self.assertEqual([s.start for s in reconstituted.prices.hp_slots], [time(8, 0), time(18, 0)])
+        self.assertEqual(reconstituted.planning.setpoints[0].time, time(21, 45))
+
+    def test_base_prices_keep_mode(self):
+        client_id = 405
+        client = self.create_dummy_client(client_id)
+        client.prices = Prices(mode="BASE")
+        client.prices.base = 0.25
+        client.prices.resale_price = 0.08
+        self.manager.create_client_in_db(client)
+
+        reconstituted = self.manager.reconstitute_client(client_id)
+        self.assertEqual(reconstituted.prices.mode, "BASE")
+        self.assertEqual(reconstituted.prices.base, 0.25)
+        self.assertEqual(reconstituted.prices.resale_price, 0.08)
+
+    def test_update_prices_hphc_to_base(self):
+        client_id = 406
+        self.manager.create_client_in_db(self.create_dummy_client(client_id))
+
+        prices = Prices(mode="BASE")
+        prices.base = 0.2
+        self.manager.update_client_in_db(client_id, prices=prices)
+
+        # Os preços hp/hc e os créneaux HP do modo anterior são apagados, também para um novo manager
+        with DBManager(self.db_path) as outro:
+            reconstituted = outro.reconstitute_client(client_id)
+        self.assertEqual(reconstituted.prices.mode, "BASE")
+        self.assertEqual(reconstituted.prices.base, 0.2)
+        with self.manager.db.curseur() as curseur:
+            tipos = curseur.execute("SELECT type FROM prices WHERE client_id = ? ORDER BY type", (client_id,)).fetchall()
+            creneaux = curseur.execute("SELECT COUNT(*) FROM creneaux_hp WHERE client_id = ?", (client_id,)).fetchone()[0]
+        self.assertEqual(tipos, [("base",), ("revente",)])
+        self.assertEqual(creneaux, 0)
+
+        # E de volta para HPHC
+        self.manager.update_client_in_db(client_id, prices=self.create_dummy_client(client_id).prices)
+        self.assertEqual(self.manager.reconstitute_client(client_id).prices.mode, "HPHC")
+
+    def test_update_hp_slots(self):
+        client_id = 404
+        self.manager.create_client_in_db(self.create_dummy_client(client_id))
+
+        prices = Prices(mode="HPHC")
+        prices.hp_slots = [TimeSlot(start=time(6, 0), end=time(7, 30)),
+                           TimeSlot(start=time(12, 0), end=time(14, 0)),
+                           TimeSlot(start=time(20, 0), end=time(23, 0))]
+        self.manager.update_client_in_db(client_id, prices=prices)
+
+        reconstituted = self.manager.reconstitute_client(client_id)
+        self.assertEqual(sorted((s.start, s.end) for s in reconstituted.prices.hp_slots),
+                         [(time(6, 0), time(7, 30)), (time(12, 0), time(14, 0)), (time(20, 0), time(23, 0))])
+
+    def test_create_client_rollback_on_error(self):
+        client_id = 407
+        # Erro que não é IntegrityError no meio da transação (aqui: SQL inválido para water_heaters)
+        with mock.patch("optimiser_engine.persistence.DB_manager_models.client_manager.SQL_INS_WH", "INSERT INTO"):
+            with self.assertRaises(Exception):
+                self.manager.create_client_in_db(self.create_dummy_client(client_id))
+        self.assertFalse(self.manager.db.connexion.in_transaction)
+
+        # Nada foi gravado e a conexão continua utilizável
+        with self.assertRaises(ClientNotFound):
+            self.manager.reconstitute_client(client_id)
+        self.manager.create_client_in_db(self.create_dummy_client(client_id))
+        self.assertEqual(self.manager.reconstitute_client(client_id).client_id, client_id)
+
+    def test_client_without_water_heater(self):
+        client_id = 409
+        client = self.create_dummy_client(client_id)
+        client.water_heater = None
+        self.manager.create_client_in_db(client)
+
+        reconstituted = self.manager.reconstitute_client(client_id)
+        self.assertIsNone(reconstituted.water_heater)
+        self.assertEqual(len(reconstituted.prices.hp_slots), 2)
+
+    def test_update_unknown_client(self):
+        with self.assertRaises(ClientNotFound):
+            self.manager.update_client_in_db(999, features=Features(gradation=True, mode=OptimizationMode.COST))
+        with self.assertRaises(ClientNotFound):
+            self.manager.update_client_in_db(999, water_heater=WaterHeater(volume=100.0, power=1000.0))
+        # Nenhum cliente foi criado pelo upsert
+        self.assertEqual(self.manager.list_all_clients(), [])
+
+    def test_delete_client_cascades(self):
+        client_id = 410
+        self.manager.create_client_in_db(self.create_dummy_client(client_id))
+        self.manager.create_decision_in_db(client_id, datetime(2025, 1, 1, 12, 0), 1500.0)
+
+        # Um único DELETE em clients: as linhas dependentes são apagadas pelo ON DELETE CASCADE
+        self.manager.delete_client(client_id)
+        conexao = self.manager.db.connexion
+        for tabela in ("consignes", "constraints", "plages_interdites", "prices",
+                       "creneaux_hp", "water_heaters", "decisions"):
+            total = conexao.execute(f"SELECT COUNT(*) FROM {tabela} WHERE client_id = ?", (client_id,)).fetchone()[0]
+            self.assertEqual(total, 0, tabela)
+
+    def test_reconstitute_cache(self):
+        client_id = 406
+        self.manager.create_client_in_db(self.create_dummy_client(client_id))
+
+        primeiro = self.manager.reconstitute_client(client_id)
+        # Segunda leitura servida pelo cache: um novo objeto, sem reler as linhas do cliente
+        with mock.patch.object(ClientManager, "_lire_donnees_client") as ler:
+            segundo = self.manager.reconstitute_client(client_id)
+        ler.assert_not_called()
+        self.assertIsNot(primeiro, segundo)
+        self.assertEqual(len(segundo.prices.hp_slots), 2)
+
+        # Uma escrita feita por outro manager (outra conexão) invalida o cache
+        with DBManager(self.db_path) as outro:
+            outro.update_client_in_db(client_id, water_heater=WaterHeater(volume=300.0, power=3000.0))
+        self.assertEqual(self.manager.reconstitute_client(client_id).water_heater.volume, 300.0)
+        conexao = sqlite3.connect(self.db_path)
+        conexao.execute("DELETE FROM creneaux_hp WHERE client_id = ?", (client_id,))
+        conexao.commit()
+        conexao.close()
+        self.assertEqual(self.manager.reconstitute_client(client_id).prices.hp_slots, [])
+
+        # A atualização invalida o cache
+        self.manager.update_client_in_db(client_id, water_heater=WaterHeater(volume=200.0, power=3000.0))
+        self.assertEqual(self.manager.reconstitute_client(client_id).water_heater.volume, 200.0)
+
+        # A remoção também
+        self.manager.delete_client(client_id)
+        with self.assertRaises(ClientNotFound):
+            self.manager.reconstitute_client(client_id)
+
+    def test_cache_concurrent_threads(self):
+        # Leituras e atualizações simultâneas do cache compartilhado entre threads
+        ids = list(range(601, 611))
+        for client_id in ids:
+            self.manager.create_client_in_db(self.create_dummy_client(client_id))
+        erros = []
+
+        def ler():
+            try:
+                for _ in range(20):
+                    self.manager.reconstitute_clients(ids)
+                    self.manager.reconstitute_client(ids[0])
+            except Exception as e:
+                erros.append(e)
+
+        def atualizar():
+            try:
+                for volume in range(100, 120):
+                    self.manager.update_client_in_db(ids[0], water_heater=WaterHeater(volume=float(volume), power=2000.0))
+            except Exception as e:
+                erros.append(e)
+
+        threads = [threading.Thread(target=ler) for _ in range(4)] + [threading.Thread(target=atualizar)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(erros, [])
+        self.assertEqual(self.manager.reconstitute_client(ids[0]).water_heater.volume, 119.0)
+
+    def test_reconstitute_clients(self):
+        ids = [501, 502, 503]
+        for client_id in ids:
+            self.manager.create_client_in_db(self.create_dummy_client(client_id))
+        self.manager.reconstitute_client(502) # Um cliente já no cache
+
+        clientes = self.manager.reconstitute_clients([503, 501, 502])
+        self.assertEqual([c.client_id for c in clientes], [503, 501, 502])
+        for cliente in clientes:
+            self.assertEqual(cliente.water_heater.volume, 150.0)
+            self.assertEqual(len(cliente.prices.hp_slots), 2)
+
+        with self.assertRaises(ClientNotFound):
+            self.manager.reconstitute_clients([501, 999])
+
+    def test_reconstitute_clients_variable_limit(self):
+        # Lotes compatíveis com o limite de 999 parâmetros das versões antigas do SQLite
+        ids = list(range(2000, 2300))
+        self.manager.db.bulk_insert("clients", ("client_id", "gradation", "mode"), ((i, 0, "cost") for i in ids))
+        self.manager.db.connexion.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+        clientes = self.manager.reconstitute_clients(ids)
+        self.assertEqual([c.client_id for c in clientes], ids)
+
+    def test_update_planning_and_forbidden_slots(self):
+        client_id = 408
+        self.manager.create_client_in_db(self.create_dummy_client(client_id))
+
+        planning = Planning([Setpoint(0, time(7, 0), 55.0), Setpoint(3, time(19, 30), 60.0, 40.0)])
+        constraints = Constraints(forbidden_slots=[TimeSlot(time(1, 0), time(2, 0)), TimeSlot(time(13, 0), time(14, 15))],
+                                  minimum_temperature=40.0)
+        self.manager.update_client_in_db(client_id, planning=planning, constraints=constraints)
+
+        reconstituted = self.manager.reconstitute_client(client_id)
+        self.assertEqual(sorted((s.day, s.time, s.temperature, s.drawn_volume) for s in reconstituted.planning.setpoints),
+                         [(0, time(7, 0), 55.0, 30), (3, time(19, 30), 60.0, 40.0)])
+        self.assertEqual(sorted((s.start, s.end) for s in reconstituted.constraints.forbidden_slots),
+                         [(time(1, 0), time(2, 0)), (time(13, 0), time(14, 15))])
+
+    def test_concurrent_threads(self):
+        ids = list(range(601, 641))
+        erros = []
+
+        def criar(client_id):
+            try:
+                self.manager.create_client_in_db(self.create_dummy_client(client_id))
+            except Exception as e:
+                erros.append(e)
+
+        # Cada thread usa a sua própria conexão (e a sua própria transação)
+        threads = [threading.Thread(target=criar, args=(client_id,)) for client_id in ids]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(erros, [])
+        self.assertEqual(sorted(self.manager.list_all_clients()), ids)
+
+    def test_memory_database_threads(self):
+        # Base ':memory:': uma só conexão para todos os threads, as transações não se entrelaçam
+        with DBManager(":memory:") as manager:
+            erros = []
+
+            def gravar(inicio):
+                try:
+                    for client_id in range(inicio, inicio + 10):
+                        manager.create_client_in_db(self.create_dummy_client(client_id))
+                        manager.create_decision_in_db(client_id, datetime(2025, 1, 1, 12, 0), 1500.0)
+                except Exception as e:
+                    erros.append(e)
+
+            threads = [threading.Thread(target=gravar, args=(1000 + 100 * i,)) for i in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+            self.assertEqual(erros, [])
+            self.assertEqual(len(manager.list_all_clients()), 40)
+
+    def test_schema_created_once_per_file(self):
+        # O esquema já foi criado no setUp: um novo manager no mesmo arquivo não executa nenhum DDL
+        with DBManager(self.db_path) as outro, mock.patch.object(Database, "create_all_tables") as criar:
+            outro.create_client_in_db(self.create_dummy_client(701))
+            outro.create_decision_in_db(701, datetime(2025, 1, 1, 12, 0), 1500.0)
+        criar.assert_not_called()
+
+    def test_thread_connections_closed_at_thread_end(self):
+        # Cada thread abre a sua conexão; ela é fechada quando o thread termina (sem esperar close_db)
+        db = self.manager.db
+        db.close_db()
+
+        def ler():
+            with db.curseur() as curseur:
+                curseur.execute("SELECT COUNT(*) FROM clients").fetchone()
+
+        threads = [threading.Thread(target=ler) for _ in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        gc.collect()
+        self.assertLessEqual(len(db._connexions), 1)
+
+    def test_shared_database(self):
+        # Managers construídos com a mesma instância Database: uma só conexão para os dois
+        db = Database(self.db_path)
+        clientes, decisoes = ClientManager(self.db_path, db), DecisionsManager(self.db_path, db)
+        self.assertIs(clientes.db, decisoes.db)
+        clientes.create_client_in_db(self.create_dummy_client(702))
+        decisoes.create_decision_in_db(702, datetime(2025, 1, 1, 12, 0), 1500.0)
+        self.assertEqual(len(db._connexions), 1)
+        clientes.close()
+
+    def test_bulk_insert(self):
+        # Sem connect_db prévio: bulk_insert abre a conexão
+        db = self.manager.db
+        db.close_db()
+        inseridos = db.bulk_insert("clients", ("client_id", "gradation", "mode"),
+                                   ((i, 0, "cost") for i in range(1, 51)))
+        self.assertEqual(inseridos, 50)
+
+        # Com OR IGNORE as duplicatas são ignoradas
+        inseridos = db.bulk_insert("clients", ("client_id", "gradation", "mode"),
+                                   [(50, 0, "cost"), (51, 1, "AutoCons")], ignorer_doublons=True)
+        self.assertEqual(inseridos, 1)
+
+        # Sem OR IGNORE o lote inteiro é anulado
+        with self.assertRaises(DatabaseIntegrityError):
+            db.bulk_insert("clients", ("client_id", "gradation", "mode"), [(52, 0, "cost"), (1, 0, "cost")])
+        total = db.connexion.execute("SELECT COUNT(*) FROM clients").fetchone()[0]
+        db.close_db()
+        self.assertEqual(total, 51)
+
     def test_full_client_cycle(self):
         client_id = 500
         client = self.create_dummy_client(client_id)
@@ -96,6 +442,7 @@ class TestDBManagerFull(unittest.TestCase):
         
         all_ids = self.manager.list_all_clients()
         self.assertIn(client_id, all_ids)
+        self.assertEqual(list(self.manager.iter_all_clients()), all_ids)
         
         self.manager.delete_client(client_id)
         with self.assertRaises(ClientNotFound):
@@ -111,6 +458,241 @@ class TestDBManagerFull(unittest.TestCase):
         history = self.manager.reconstitute_all_decisions(client_id)
         self.assertEqual(len(history), 1)
         self.assertEqual(float(history[0]['puissance']), 1200.0)
+        self.assertEqual(history[0]['date'], now)
+
+        # Data gravada em segundos inteiros, e a remoção por data encontra a linha
+        self.manager.db.connect_db()
+        tipo = self.manager.db.connexion.execute(
+            "SELECT typeof(date) FROM decisions WHERE client_id = ?", (client_id,)).fetchone()[0]
+        self.assertEqual(tipo, "integer")
+        self.manager.delete_decision(client_id, now)
+        with self.assertRaises(DecisionNotFound):
+            self.manager.reconstitute_all_decisions(client_id)
+
+    def test_decisions_period(self):
+        client_id = 304
+        self.manager.create_client_in_db(self.create_dummy_client(client_id))
+        for hora in (6, 9, 12, 15, 18):
+            self.manager.create_decision_in_db(client_id, datetime(2025, 3, 1, hora, 0), float(hora * 100))
+
+        # Limites incluídos, resultado ordenado por data
+        periodo = self.manager.reconstitute_decisions(client_id, datetime(2025, 3, 1, 9, 0), datetime(2025, 3, 1, 15, 0))
+        self.assertEqual([d['date'].hour for d in periodo], [9, 12, 15])
+        self.assertEqual([d['puissance'] for d in periodo], [900.0, 1200.0, 1500.0])
+
+        # Mesma período em tabelas NumPy
+        datas, potencias = self.manager.reconstitute_decisions_arrays(client_id, datetime(2025, 3, 1, 9, 0), datetime(2025, 3, 1, 15, 0))
+        self.assertEqual(datas.tolist(), [d['date'] for d in periodo])
+        self.assertEqual(potencias.tolist(), [900.0, 1200.0, 1500.0])
+        with self.assertRaises(DecisionNotFound):
+            self.manager.reconstitute_decisions_arrays(client_id, datetime(2025, 3, 2), datetime(2025, 3, 3))
+
+        with self.assertRaises(DecisionNotFound):
+            self.manager.reconstitute_decisions(client_id, datetime(2025, 3, 2), datetime(2025, 3, 3))
+
+        # A busca por período usa a chave primária (client_id, date), sem varrer a tabela
+        self.manager.db.connect_db()
+        plano = self.manager.db.connexion.execute(
+            "EXPLAIN QUERY PLAN " + SQL_SEL_DECISIONS_PERIODE, (client_id, 0, 1)).fetchall()
+        self.assertIn("USING PRIMARY KEY (client_id=? AND date>? AND date<?)", plano[0][-1])
+
+    def test_decisions_keep_microseconds(self):
+        client_id = 307
+        self.manager.create_client_in_db(self.create_dummy_client(client_id))
+        base = datetime(2025, 6, 1, 12, 0, 0)
+        datas = [base, base + timedelta(microseconds=1), base + timedelta(milliseconds=500)]
+        # Duas decisões na mesma segundo não colidem na chave (client_id, date)
+        self.manager.bulk_create_decisions(client_id, [(d, 1.0) for d in datas])
+        self.assertEqual([d['date'] for d in self.manager.reconstitute_all_decisions(client_id)], datas)
+
+        lidas, _ = self.manager.reconstitute_all_decisions_arrays(client_id)
+        self.assertEqual(lidas.tolist(), datas)
+
+        # Uma data com fuso é convertida em UTC sem perder os microssegundos
+        self.manager.create_decision_in_db(client_id, datetime(2025, 6, 1, 14, 0, 0, 250, tzinfo=timezone(timedelta(hours=2))), 2.0)
+        self.assertEqual(self.manager.reconstitute_all_decisions(client_id)[2]['date'], base + timedelta(microseconds=250))
+
+        self.manager.delete_decision(client_id, datas[1])
+        self.assertEqual(len(self.manager.reconstitute_all_decisions(client_id)), 3)
+
+    def test_bulk_create_decisions(self):
+        client_id = 305
+        self.manager.create_client_in_db(self.create_dummy_client(client_id))
+        lote = [(datetime(2025, 4, 1, hora, 0), 100.0 * hora) for hora in range(24)]
+        self.manager.bulk_create_decisions(client_id, lote)
+        self.assertEqual(len(self.manager.reconstitute_all_decisions(client_id)), 24)
+
+        # Mesmas decisões em arrays NumPy, ordenadas por data
+        datas, potencias = self.manager.reconstitute_all_decisions_arrays(client_id)
+        self.assertEqual(datas.dtype, np.dtype("datetime64[us]"))
+        self.assertEqual(datas[5], np.datetime64(datetime(2025, 4, 1, 5, 0)))
+        np.testing.assert_array_equal(potencias, [100.0 * hora for hora in range(24)])
+        with self.assertRaises(DecisionNotFound):
+            self.manager.reconstitute_all_decisions_arrays(998)
+
+        # Uma data repetida anula o lote inteiro
+        with self.assertRaises(ValueError):
+            self.manager.bulk_create_decisions(client_id, [(datetime(2025, 4, 2), 1.0), (datetime(2025, 4, 1, 0, 0), 2.0)])
+        self.assertEqual(len(self.manager.reconstitute_all_decisions(client_id)), 24)
+
+        with self.assertRaises(ClientNotFound):
+            self.manager.bulk_create_decisions(999, lote)
+
+    def test_bulk_update_decisions(self):
+        client_id = 306
+        self.manager.create_client_in_db(self.create_dummy_client(client_id))
+        datas = [datetime(2025, 5, 1, hora, 0) for hora in range(4)]
+        self.manager.bulk_create_decisions(client_id, [(d, 0.0) for d in datas])
+
+        self.manager.bulk_update_decisions(client_id, [(d, 500.0) for d in datas])
+        self.assertEqual([d['puissance'] for d in self.manager.reconstitute_all_decisions(client_id)], [500.0] * 4)
+
+        # Uma decisão inexistente anula o lote inteiro
+        with self.assertRaises(ClientNotFound):
+            self.manager.bulk_update_decisions(client_id, [(datas[0], 1.0), (datetime(2030, 1, 1), 1.0)])
+        self.assertEqual(self.manager.reconstitute_all_decisions(client_id)[0]['puissance'], 500.0)
+
+# Esquema de origem (antes do PRAGMA user_version): horas e datas em texto ISO, perfil em JSON
+ESQUEMA_ORIGINAL = """
+CREATE TABLE clients (
+    client_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    gradation INTEGER DEFAULT 0,
+    mode TEXT DEFAULT 'AutoCons',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE constraints (
+    constraint_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    client_id INTEGER,
+    temperature_minimale REAL DEFAULT 10.0,
+    profil_conso_json TEXT,
+    FOREIGN KEY (client_id) REFERENCES clients(client_id) ON DELETE CASCADE,
+    UNIQUE (client_id)
+);
+CREATE TABLE plages_interdites (
+    plage_interdite_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    client_id INTEGER,
+    heure_debut TEXT NOT NULL,
+    heure_fin TEXT NOT NULL,
+    FOREIGN KEY (client_id) REFERENCES clients(client_id) ON DELETE CASCADE,
+    UNIQUE (client_id, heure_debut, heure_fin)
+);
+CREATE TABLE water_heaters (
+    water_heater_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    client_id INTEGER,
+    volume REAL NOT NULL,
+    power REAL NOT NULL,
+    coeff_isolation REAL DEFAULT 0.0,
+    temperature_eau_froide_celsius REAL DEFAULT 10.0,
+    FOREIGN KEY (client_id) REFERENCES clients(client_id) ON DELETE CASCADE,
+    UNIQUE (client_id)
+);
+CREATE TABLE consignes (
+    consigne_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    client_id INTEGER,
+    day INTEGER NOT NULL,
+    moment TEXT NOT NULL,
+    temperature REAL,
+    volume REAL DEFAULT 30.0,
+    FOREIGN KEY (client_id) REFERENCES clients(client_id) ON DELETE CASCADE,
+    UNIQUE (client_id, day, moment)
+);
+CREATE TABLE creneaux_hp (
+    creneau_hp_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    client_id INTEGER,
+    heure_debut TEXT,
+    heure_fin TEXT,
+    FOREIGN KEY (client_id) REFERENCES clients(client_id) ON DELETE CASCADE,
+    UNIQUE (client_id, heure_debut, heure_fin)
+);
+CREATE TABLE prices (
+    client_id INTEGER,
+    type TEXT,
+    prix REAL NOT NULL,
+    PRIMARY KEY (client_id, type),
+    FOREIGN KEY (client_id) REFERENCES clients(client_id) ON DELETE CASCADE
+);
+CREATE TABLE decisions (
+    decision_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    client_id INTEGER,
+    date TEXT NOT NULL,
+    puissance REAL NOT NULL,
+    FOREIGN KEY (client_id) REFERENCES clients(client_id) ON DELETE CASCADE,
+    UNIQUE (client_id, date)
+);
+CREATE INDEX idx_decisions_client ON decisions(client_id);
+CREATE INDEX idx_decisions_date ON decisions(date);
+"""
+
+
+class TestMigracaoEsquema(unittest.TestCase):
+    db_path = "test_migracao.db"
+
+    def setUp(self):
+        self._remover_arquivos_db()
+
+    def tearDown(self):
+        self._remover_arquivos_db()
+
+    def _remover_arquivos_db(self):
+        # O arquivo é recriado a cada teste: o esquema deve ser verificado de novo
+        Database._schemas_prets.discard(os.path.abspath(self.db_path))
+        for sufixo in ("", "-wal", "-shm"):
+            try:
+                os.remove(self.db_path + sufixo)
+            except OSError:
+                pass
+
+    def _criar_banco_original(self, versao=0):
+        # Arquivo gravado pela versão de origem do código, com um cliente completo e uma decisão
+        conexao = sqlite3.connect(self.db_path)
+        conexao.executescript(ESQUEMA_ORIGINAL)
+        conexao.execute("INSERT INTO clients (client_id, gradation, mode) VALUES (1, 0, 'cost')")
+        conexao.execute("INSERT INTO constraints (client_id, temperature_minimale, profil_conso_json) VALUES (1, 45.0, ?)",
+                        (json.dumps(np.arange(7 * 24, dtype=float).reshape(7, 24).tolist()),))
+        conexao.execute("INSERT INTO water_heaters (client_id, volume, power) VALUES (1, 150.0, 2000.0)")
+        conexao.execute("INSERT INTO consignes (client_id, day, moment, temperature, volume) VALUES (1, 2, '07:30:00', 55.0, 40.0)")
+        conexao.execute("INSERT INTO plages_interdites (client_id, heure_debut, heure_fin) VALUES (1, '01:00:00', '02:30:00')")
+        conexao.execute("INSERT INTO creneaux_hp (client_id, heure_debut, heure_fin) VALUES (1, '08:00:00', '12:00:00')")
+        conexao.executemany("INSERT INTO prices (client_id, type, prix) VALUES (1, ?, ?)",
+                            [("hp", 0.25), ("hc", 0.15), ("revente", 0.1)])
+        conexao.execute("INSERT INTO decisions (client_id, date, puissance) VALUES (1, ?, 1500.0)",
+                        (datetime(2025, 1, 1, 12, 0).isoformat(),))
+        conexao.execute(f"PRAGMA user_version = {versao}")
+        conexao.commit()
+        conexao.close()
+
+    def _verificar_migracao(self):
+        with DBManager(self.db_path) as manager:
+            client = manager.reconstitute_client(1)
+            decisoes = manager.reconstitute_all_decisions(1)
+            versao = manager.db.connexion.execute("PRAGMA user_version").fetchone()[0]
+
+        self.assertEqual(versao, SCHEMA_VERSION)
+        np.testing.assert_array_equal(client.constraints.consumption_profile.data,
+                                      np.arange(7 * 24, dtype=float).reshape(7, 24))
+        self.assertEqual([(s.start, s.end) for s in client.constraints.forbidden_slots], [(time(1, 0), time(2, 30))])
+        self.assertEqual(client.prices.mode, "HPHC")
+        self.assertEqual([(s.start, s.end) for s in client.prices.hp_slots], [(time(8, 0), time(12, 0))])
+        self.assertEqual(decisoes, [{'date': datetime(2025, 1, 1, 12, 0), 'puissance': 1500.0}])
+
+        # O arquivo migrado aceita as gravações do código atual
+        with DBManager(self.db_path) as manager:
+            manager.create_decision_in_db(1, datetime(2025, 1, 1, 13, 0), 1000.0)
+            self.assertEqual(len(manager.reconstitute_all_decisions(1)), 2)
+
+    def test_original_schema_is_migrated(self):
+        self._criar_banco_original()
+        self._verificar_migracao()
+
+    def test_wrongly_stamped_schema_is_migrated(self):
+        # A versão sozinha não basta: a estrutura também é verificada antes de confiar no arquivo
+        self._criar_banco_original(versao=SCHEMA_VERSION)
+        self._verificar_migracao()
+
+    def test_newer_schema_is_rejected(self):
+        self._criar_banco_original(versao=SCHEMA_VERSION + 1)
+        with DBManager(self.db_path) as manager, self.assertRaises(DatabaseSchemaError):
+            manager.reconstitute_client(1)
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file